@@ -0,0 +1,255 @@
+"""
+Benchmarks for resolving mapped URLs, run against a local SQLite database.
+
+    python runbenchmarks.py [--sizes 10,1000,10000] [--output results.json]
+                            [--compare previous.json]
+
+Results are written as JSON so that runs from different commits can be
+compared with --compare.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+
+from django.conf import settings
+
+settings.configure(
+    DATABASES={
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        }
+    },
+    INSTALLED_APPS=(
+        'django.contrib.auth',
+        'django.contrib.contenttypes',
+        'django.contrib.sites',
+        'urlmapper'
+    ),
+    MIDDLEWARE_CLASSES=(),
+    ROOT_URLCONF=('urlmapper.tests.urls'),
+    SITE_ID=1,
+    LANGUAGE_CODE='en',
+    URLMAPPER_CONTENTTYPES=[('auth', 'user')],
+)
+
+import django
+if hasattr(django, 'setup'):
+    django.setup()
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext, override_settings
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+from urlmapper import cache, settings as urlmapper_settings
+from urlmapper.decorators import cache_mapping
+from urlmapper.helpers import (
+    check_mapped_url, get_mapped_url, get_mapped_urls, warm_cache
+)
+from urlmapper.models import URLMap
+
+
+MAPPING_TYPES = ('url', 'object', 'view', 'function')
+
+# The number of keys used by each template benchmark
+TEMPLATE_KEYS = 20
+
+# At most this many keys are looked up by each single-key benchmark
+SAMPLE_SIZE = 1000
+
+
+def _static_function():
+    return '/function/'
+
+
+def _create_mappings(keys, mapping_type):
+    URLMap._objects.all().delete()
+    User.objects.all().delete()
+    if mapping_type == 'function':
+        return
+    if mapping_type == 'object':
+        User.objects.bulk_create(User(username=key) for key in keys)
+        users = dict(User.objects.values_list('username', 'pk'))
+    url_maps = []
+    for i, key in enumerate(keys):
+        if mapping_type == 'url':
+            url_map = URLMap(key=key, url='/test/')
+        elif mapping_type == 'object':
+            url_map = URLMap(
+                key=key,
+                content_type=ContentType.objects.get_for_model(User),
+                object_id=users[key]
+            )
+        else:
+            url_map = URLMap(key=key, view_name='test', view_keywords='pk=%d' % i)
+        # bulk_create does not call save(), which resolves the URL
+        url_map.resolved_url = url_map.get_stored_url()
+        url_maps.append(url_map)
+    URLMap._objects.bulk_create(url_maps)
+
+
+def _count_objects():
+    gc.collect()
+    return len(gc.get_objects())
+
+
+def _measure(function, calls, prepare=None):
+    """
+    Return the seconds and queries per call to function, the number of objects
+    tracked by the garbage collector that it left behind (e.g. in caches), and
+    on Python 3 the peak bytes allocated.
+    """
+    if prepare is not None:
+        prepare()
+    objects = _count_objects()
+    if tracemalloc is not None:
+        tracemalloc.start()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.time()
+        function()
+        seconds = time.time() - start
+    allocated = None
+    if tracemalloc is not None:
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        'calls': calls,
+        'seconds_per_call': seconds / calls,
+        'queries_per_call': len(queries) / float(calls),
+        'objects_retained': _count_objects() - objects,
+        'peak_bytes_allocated': allocated,
+    }
+
+
+def _benchmarks(keys):
+    sample = keys[:SAMPLE_SIZE]
+    template_keys = keys[:TEMPLATE_KEYS]
+    source = '{% load urlmapper_tags %}' + ''.join(
+        "{% if '" + key + "'|is_mapped_url %}{% mapped_url '" + key + "' %}{% endif %}"
+        for key in template_keys
+    )
+    template = Template(source)
+    preload_template = Template(
+        '{% load urlmapper_tags %}{% preload_mapped_urls %}' +
+        source.replace('{% load urlmapper_tags %}', '') +
+        '{% endpreload_mapped_urls %}'
+    )
+    context = Context({'request': None})
+
+    def each(function):
+        def run():
+            for key in sample:
+                function(key)
+        return run
+
+    return [
+        ('get_mapped_url', len(sample), each(get_mapped_url)),
+        ('check_mapped_url', len(sample), each(check_mapped_url)),
+        ('get_mapped_urls', 1, lambda: get_mapped_urls(sample)),
+        ('template_tags', 1, lambda: template.render(context)),
+        ('template_tags_preloaded', 1, lambda: preload_template.render(context)),
+    ]
+
+
+def run(sizes):
+    results = []
+    for size in sizes:
+        keys = ['key-{i}'.format(i=i) for i in range(size)]
+        for mapping_type in MAPPING_TYPES:
+            functions = {}
+            if mapping_type == 'function':
+                functions = dict(
+                    (key, cache_mapping()(_static_function)) for key in keys
+                )
+            with override_settings(
+                URLMAPPER_KEYS=keys,
+                URLMAPPER_FUNCTIONS=functions
+            ):
+                reload(urlmapper_settings)
+                _create_mappings(keys, mapping_type)
+                for name, calls, function in _benchmarks(keys):
+                    for state, prepare in (
+                        ('cold', cache.clear),
+                        ('warm', lambda: (cache.clear(), warm_cache())),
+                    ):
+                        result = _measure(function, calls, prepare)
+                        result.update(
+                            benchmark=name,
+                            keys=size,
+                            mapping=mapping_type,
+                            cache=state
+                        )
+                        results.append(result)
+                        sys.stderr.write(
+                            "{benchmark:24} {keys:>6} {mapping:9} {cache:5} "
+                            "{us:10.1f}us/call {queries:8.2f} queries/call "
+                            "{objects_retained:8} objects\n".format(
+                                us=result['seconds_per_call'] * 1e6,
+                                queries=result['queries_per_call'],
+                                **result
+                            )
+                        )
+    reload(urlmapper_settings)
+    return results
+
+
+def compare(results, previous):
+    """
+    Print the ratio of each result's time per call to the previous run's.
+    """
+    def index(results):
+        return dict(
+            ((r['benchmark'], r['keys'], r['mapping'], r['cache']), r)
+            for r in results
+        )
+    previous = index(previous['results'])
+    for key, result in sorted(index(results).items()):
+        if key in previous and previous[key]['seconds_per_call']:
+            print("{0:24} {1:>6} {2:9} {3:5} {ratio:6.2f}x".format(
+                *key,
+                ratio=result['seconds_per_call'] / previous[key]['seconds_per_call']
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10,1000,10000')
+    parser.add_argument('--output', help="File to write JSON results to")
+    parser.add_argument('--compare', help="JSON results of a previous run")
+    options = parser.parse_args()
+
+    call_command('syncdb', interactive=False, verbosity=0)
+    results = run([int(size) for size in options.sizes.split(',')])
+    output = json.dumps(
+        {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'created': int(time.time()),
+            'results': results,
+        },
+        indent=2,
+        sort_keys=True
+    )
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    if options.compare:
+        with open(options.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
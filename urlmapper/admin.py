@@ -1,16 +1,93 @@
+from django import forms
+from django.conf import settings as django_settings
+from django.conf.urls import patterns, url
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db.models import Q
+from django.db.models.query import prefetch_related_objects
+from django.http import Http404
+from django.template.response import TemplateResponse
 from django.utils.translation import ugettext_lazy as _
 
 from models import URLMap
+from registry import get_key_choices
 
 import settings
 
 
+class URLMapChangeList(ChangeList):
+
+    def get_results(self, request):
+        super(URLMapChangeList, self).get_results(request)
+        # Fetches the objects of the mappings on the page that are not watched
+        # for changes with one query per content type. The URLs of the rest
+        # are read from resolved_url.
+        self.result_list = list(self.result_list)
+        prefetch_related_objects(
+            [
+                url_map for url_map in self.result_list
+                if url_map.content_type_id is not None
+                and not url_map.is_watched()
+            ],
+            ['content_object']
+        )
+
+
+class MappingTypeListFilter(admin.SimpleListFilter):
+    title = _("Mapping type")
+    parameter_name = 'mapping_type'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('url', _("Direct")),
+            ('object', _("Object")),
+            ('view', _("View")),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'url':
+            return queryset.exclude(url='')
+        if self.value() == 'object':
+            return queryset.filter(content_type__isnull=False)
+        if self.value() == 'view':
+            return queryset.exclude(view_name='')
+        return queryset
+
+
+class URLMapForm(forms.ModelForm):
+
+    def __init__(self, *args, **kwargs):
+        super(URLMapForm, self).__init__(*args, **kwargs)
+        # The choices are read from the key registry when the form is used,
+        # not when the model is defined.
+        self.fields['key'] = forms.ChoiceField(
+            label=URLMap._meta.get_field('key').verbose_name,
+            choices=get_key_choices()
+        )
+        self.fields['language'] = forms.ChoiceField(
+            label=URLMap._meta.get_field('language').verbose_name,
+            help_text=URLMap._meta.get_field('language').help_text,
+            choices=[('', _("Every language"))] + list(django_settings.LANGUAGES),
+            required=False
+        )
+
+    class Meta:
+        model = URLMap
+        fields = '__all__'
+
+
 class URLMapAdmin(admin.ModelAdmin):
 
-    list_display = ('key', 'mapping_type', 'get_url')
+    form = URLMapForm
+
+    # URLs are read from resolved_url, apart from those of objects that are
+    # not watched for changes, which are prefetched by URLMapChangeList.
+    list_display = ('key', 'site_id', 'language', 'mapping_type', 'get_resolved_url')
+    list_filter = (MappingTypeListFilter, 'site_id', 'language')
+    # Searched by get_search_results
+    search_fields = ('key', 'url')
 
-    fieldsets = [(None, {'fields': ('key',)})]
+    fieldsets = [(None, {'fields': ('key', 'site_id', 'language')})]
     if 'url' in settings.URLMAPPER_ALLOWED_MAPPINGS:
         fieldsets.append((_("URL mapping"), {'fields': ('url',)}))
     if 'object' in settings.URLMAPPER_ALLOWED_MAPPINGS:
@@ -18,5 +95,49 @@ class URLMapAdmin(admin.ModelAdmin):
     if 'view_name' in settings.URLMAPPER_ALLOWED_MAPPINGS:
         fieldsets.append((_("View mapping"), {'fields': ('view_name', 'view_keywords')}))
 
+    def get_changelist(self, request, **kwargs):
+        return URLMapChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Return the mappings whose keys or URLs start with each word of the
+        search term. The searches are case-sensitive, unlike the admin's own
+        prefix searches, so that they can use the indexes on key and url.
+        """
+        for word in search_term.split():
+            queryset = queryset.filter(
+                Q(key__startswith=word) | Q(url__startswith=word)
+            )
+        return queryset, False
+
+    def get_urls(self):
+        return patterns(
+            '',
+            url(
+                r'^metrics/$',
+                self.admin_site.admin_view(self.metrics_view),
+                name='urlmapper_urlmap_metrics'
+            ),
+        ) + super(URLMapAdmin, self).get_urls()
+
+    def metrics_view(self, request):
+        """
+        Show the hottest and slowest keys recorded by the metrics backend, if
+        it keeps a report.
+        """
+        get_report = getattr(settings.METRICS_BACKEND, 'get_report', None)
+        if get_report is None or not self.has_change_permission(request):
+            raise Http404
+        return TemplateResponse(
+            request,
+            'admin/urlmapper/urlmap/metrics.html',
+            {
+                'title': _("URL map metrics"),
+                'opts': self.model._meta,
+                'report': get_report(),
+            },
+            current_app=self.admin_site.name
+        )
+
 
 admin.site.register(URLMap, URLMapAdmin)
@@ -0,0 +1,24 @@
+import logging
+
+from django.apps import AppConfig
+from django.db import DatabaseError
+from django.utils.translation import ugettext_lazy as _
+
+logger = logging.getLogger('urlmapper')
+
+
+class URLMapperConfig(AppConfig):
+    name = 'urlmapper'
+    verbose_name = _("URL mapper")
+
+    def ready(self):
+        import settings
+        if not settings.URLMAPPER_WARM_ON_STARTUP:
+            return
+        from helpers import warm_cache
+        try:
+            warm_cache()
+        except DatabaseError as e:
+            # e.g. the tables do not exist yet because this process is about
+            # to run the migrations
+            logger.warning("Could not warm the URL mapper cache: %s", e)
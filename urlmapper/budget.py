@@ -0,0 +1,137 @@
+from contextlib import contextmanager
+import logging
+import threading
+
+
+logger = logging.getLogger('urlmapper')
+
+_state = threading.local()
+
+# Lookups from these sources query the database
+DATABASE_SOURCES = ('url', 'object', 'view', 'unmapped')
+
+
+class LookupBudgetExceeded(Exception):
+    pass
+
+
+class LookupLog(object):
+    """
+    The mapped URL lookups that went to the database while tracking, as a list
+    of (keys, template name) tuples. A batch of keys looked up together counts
+    as one lookup; the template name is None if it is not known.
+    """
+
+    def __init__(self, max_lookups=None, name=None):
+        self.max_lookups = max_lookups
+        self.name = name
+        self.lookups = []
+
+    def __len__(self):
+        return len(self.lookups)
+
+    def record(self, keys, template_name=None):
+        self.lookups.append((tuple(keys), template_name))
+
+    def is_exceeded(self):
+        return self.max_lookups is not None and len(self) > self.max_lookups
+
+    def get_report(self):
+        lines = [
+            "{count} uncached mapped URL lookup(s){name}, budget {budget}:".format(
+                count=len(self),
+                name=" in {name}".format(name=self.name) if self.name else "",
+                budget=self.max_lookups
+            )
+        ]
+        for keys, template_name in self.lookups:
+            lines.append("  {keys}{template}".format(
+                keys=", ".join(keys),
+                template=" ({name})".format(
+                    name=template_name
+                ) if template_name else ""
+            ))
+        return "\n".join(lines)
+
+
+def get_logs():
+    """
+    Return the lookup logs being recorded in the current thread.
+    """
+    return getattr(_state, 'logs', ())
+
+
+def record(keys):
+    """
+    Record a lookup of the given keys in every log in the current thread.
+    """
+    template_name = getattr(_state, 'template_name', None)
+    for log in get_logs():
+        log.record(keys, template_name)
+
+
+@contextmanager
+def rendering(template_name):
+    """
+    Attribute lookups made within the block to the named template.
+    """
+    previous = getattr(_state, 'template_name', None)
+    _state.template_name = template_name
+    try:
+        yield
+    finally:
+        _state.template_name = previous
+
+
+def start(max_lookups=None, name=None):
+    log = LookupLog(max_lookups, name)
+    _state.logs = get_logs() + (log,)
+    return log
+
+
+def finish(log):
+    _state.logs = tuple(l for l in get_logs() if l is not log)
+
+
+def check(log, raise_exception=False):
+    """
+    Warn, or raise a LookupBudgetExceeded, if a log exceeded its budget.
+    """
+    if log.is_exceeded():
+        if raise_exception:
+            raise LookupBudgetExceeded(log.get_report())
+        logger.warning(log.get_report())
+
+
+@contextmanager
+def track_lookups(max_lookups=None, name=None, raise_exception=False):
+    """
+    Record the mapped URL lookups that go to the database in the current
+    thread for the duration of the block, e.g. while rendering a template.
+    """
+    log = start(max_lookups, name)
+    try:
+        yield log
+    finally:
+        finish(log)
+    check(log, raise_exception)
+
+
+class LookupBudgetTestMixin(object):
+    """
+    Adds assertMappedURLLookups to a TestCase.
+    """
+
+    @contextmanager
+    def assertMappedURLLookups(self, max_lookups):
+        """
+        Fail if more than max_lookups mapped URL lookups go to the database
+        within the block.
+        """
+        log = start(max_lookups, name=self.id())
+        try:
+            yield log
+        finally:
+            finish(log)
+        if log.is_exceeded():
+            self.fail(log.get_report())
@@ -0,0 +1,359 @@
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+
+from django.conf import settings as django_settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.urlresolvers import get_script_prefix, get_urlconf, reverse
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.utils.translation import get_language
+
+try:
+    from django.core.cache import caches
+except ImportError:  # Django < 1.7
+    from django.core.cache import get_cache
+else:
+    def get_cache(alias):
+        return caches[alias]
+
+import settings
+
+
+# Returned by lookups when a key has not been cached, since '' is a valid
+# cached value for keys that are not mapped to anything.
+MISSING = object()
+
+
+class LRUCache(object):
+    """
+    A thread-safe mapping that holds at most max_size entries, discarding the
+    least recently used entry when full. Entries may be given a timeout in
+    seconds, after which they expire.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key) is not MISSING
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            try:
+                value, expires = self._data.pop(key)
+            except KeyError:
+                return default
+            if expires is not None and expires <= time.time():
+                return default
+            self._data[key] = (value, expires)
+            return value
+
+    def set(self, key, value, timeout=None):
+        if self.max_size <= 0:
+            return
+        expires = None if timeout is None else time.time() + timeout
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """
+        Delete every entry whose key the predicate is true for.
+        """
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LRUCache(settings.URLMAPPER_LOCAL_CACHE_SIZE)
+
+reverse_cache = LRUCache(settings.URLMAPPER_LOCAL_CACHE_SIZE)
+
+# Indexes of URLs to the keys mapped to them: one for static functions, and
+# one for database mappings per (site ID, language)
+url_index = LRUCache(settings.URLMAPPER_LOCAL_CACHE_SIZE)
+
+# The shared cache generation that the contents of local_cache belong to.
+_local_generation = None
+
+# Django < 1.7 builds a new backend on each get_cache() call, and backends are
+# not guaranteed to be thread-safe, so keep one per thread.
+_shared_caches = threading.local()
+
+
+def get_shared_cache():
+    """
+    Return the Django cache configured by URLMAPPER_CACHE, or None.
+    """
+    if not settings.URLMAPPER_CACHE:
+        return None
+    alias = settings.URLMAPPER_CACHE.get('ALIAS', DEFAULT_CACHE_ALIAS)
+    try:
+        return getattr(_shared_caches, alias)
+    except AttributeError:
+        shared_cache = get_cache(alias)
+        setattr(_shared_caches, alias, shared_cache)
+        return shared_cache
+
+
+def get_partition():
+    """
+    Return the (site ID, language) that mappings are currently resolved for:
+    settings.SITE_ID and the active language, or 0 and '' where they are not
+    set.
+    """
+    return getattr(django_settings, 'SITE_ID', None) or 0, get_language() or ''
+
+
+def partition_key(key, partition=None):
+    """
+    Return the key that the URL of a database mapping is cached and memoized
+    under, by default for the current partition.
+    """
+    return (key,) + (partition or get_partition())
+
+
+def _make_key(*parts):
+    return ':'.join(
+        [settings.URLMAPPER_CACHE.get('KEY_PREFIX', 'urlmapper')] +
+        [unicode(part) for part in parts]
+    )
+
+
+def _new_generation():
+    # Generations are seeded from the clock so that, if the counter is ever
+    # evicted, it cannot restart at a value that still has entries cached.
+    return int(time.time() * 1000)
+
+
+# Changed whenever this process discards cached URLs, and seeded from the clock
+# so that it differs between runs.
+_local_version = _new_generation()
+
+
+def get_version():
+    """
+    Return a token that changes whenever the mappings change: the shared cache
+    generation if there is a shared cache, or else a version kept by this
+    process.
+    """
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return _local_version
+    return get_generation(shared_cache)
+
+
+def _increment_local_version():
+    global _local_version
+    _local_version += 1
+
+
+def get_generation(shared_cache):
+    """
+    Return the current generation of the shared cache, discarding the local
+    cache if another process has invalidated the mappings since it was filled.
+    """
+    global _local_generation
+    generation = shared_cache.get(_make_key('generation'))
+    if generation is None:
+        shared_cache.add(_make_key('generation'), _new_generation(), None)
+        generation = shared_cache.get(_make_key('generation'))
+    if generation != _local_generation:
+        local_cache.clear()
+        url_index.clear()
+        _local_generation = generation
+    return generation
+
+
+def _make_url_key(generation, key):
+    if isinstance(key, tuple):
+        key = u'\x00'.join(unicode(part) for part in key)
+    return _make_key(
+        generation,
+        hashlib.md5(key.encode('utf-8')).hexdigest()
+    )
+
+
+def _set_local(key, url, expires):
+    if expires is None:
+        local_cache.set(key, url)
+    else:
+        local_cache.set(key, url, expires - time.time())
+
+
+def get_url(key):
+    """
+    Return the cached URL for a key, or MISSING if it has not been cached.
+
+    Keys are tuples of a mapping key and either the partition it was resolved
+    for, or the values that a function mapping's URL varies on.
+    """
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return local_cache.get(key)
+    generation = get_generation(shared_cache)
+    url = local_cache.get(key)
+    if url is MISSING:
+        # Shared entries carry their expiry time, so that the local copy
+        # expires with them.
+        value = shared_cache.get(_make_url_key(generation, key))
+        if value is not None:
+            url, expires = value
+            _set_local(key, url, expires)
+    return url
+
+
+def get_urls(keys):
+    """
+    Return a dictionary of the cached URLs for those keys that are cached.
+    """
+    urls = {}
+    missing = []
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        generation = get_generation(shared_cache)
+    for key in keys:
+        url = local_cache.get(key)
+        if url is MISSING:
+            missing.append(key)
+        else:
+            urls[key] = url
+    if missing and shared_cache is not None:
+        shared_keys = dict(
+            (_make_url_key(generation, key), key) for key in missing
+        )
+        values = shared_cache.get_many(shared_keys.keys())
+        for shared_key, (url, expires) in values.items():
+            _set_local(shared_keys[shared_key], url, expires)
+            urls[shared_keys[shared_key]] = url
+    return urls
+
+
+def set_url(key, url, timeout=DEFAULT_TIMEOUT):
+    """
+    Cache the resolved URL for a key. Unless a timeout is given, the URL is
+    kept locally until the cache is cleared, and in the shared cache for
+    URLMAPPER_CACHE['TIMEOUT'] seconds. A timeout of None means forever.
+    """
+    set_urls({key: url}, timeout)
+
+
+def set_urls(urls, timeout=DEFAULT_TIMEOUT):
+    """
+    Cache the resolved URLs in a dictionary of keys to URLs, as for set_url.
+    """
+    if timeout is DEFAULT_TIMEOUT:
+        expires = None
+    else:
+        expires = None if timeout is None else time.time() + timeout
+    for key, url in urls.items():
+        _set_local(key, url, expires)
+
+    shared_cache = get_shared_cache()
+    if shared_cache is not None and urls:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = settings.URLMAPPER_CACHE.get('TIMEOUT', 3600)
+        generation = get_generation(shared_cache)
+        shared_cache.set_many(
+            dict(
+                (_make_url_key(generation, key), (url, expires))
+                for key, url in urls.items()
+            ),
+            timeout
+        )
+
+
+def _increment_generation(shared_cache):
+    try:
+        shared_cache.incr(_make_key('generation'))
+    except ValueError:
+        shared_cache.add(_make_key('generation'), _new_generation(), None)
+
+
+def delete_urls(keys):
+    """
+    Discard the cached URLs for the given mapping keys, in every partition.
+    Other processes can only be told through the shared cache generation, so
+    when a shared cache is configured, every URL is discarded there.
+    """
+    keys = frozenset(keys)
+    local_cache.delete_where(
+        lambda key: isinstance(key, tuple) and key[0] in keys
+    )
+    # Any URL may have gained or lost these keys
+    url_index.clear()
+    _increment_local_version()
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        _increment_generation(shared_cache)
+
+
+def clear():
+    """
+    Discard every cached URL, in this process and in the shared cache.
+    """
+    local_cache.clear()
+    url_index.clear()
+    _increment_local_version()
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        _increment_generation(shared_cache)
+
+
+def get_index(index_key):
+    """
+    Return the index of URLs to keys stored under a key, or MISSING if it has
+    not been built since the mappings last changed.
+    """
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        # Discards the index if the mappings have changed in another process
+        get_generation(shared_cache)
+    return url_index.get(index_key)
+
+
+def set_index(index_key, index, timeout=None):
+    url_index.set(index_key, index, timeout)
+
+
+def cached_reverse(view_name, kwargs):
+    """
+    Return reverse(view_name, kwargs=kwargs), memoized for the current URLconf,
+    script prefix and language.
+    """
+    key = (
+        get_urlconf(),
+        get_script_prefix(),
+        get_language(),
+        view_name,
+        tuple(sorted(kwargs.items()))
+    )
+    url = reverse_cache.get(key)
+    if url is MISSING:
+        url = reverse(view_name, kwargs=kwargs)
+        reverse_cache.set(key, url)
+    return url
+
+
+@receiver(setting_changed)
+def _clear_reverse_cache(sender, setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        reverse_cache.clear()
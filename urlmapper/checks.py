@@ -0,0 +1,193 @@
+import time
+from multiprocessing.pool import ThreadPool
+
+from django.conf import settings as django_settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.test.client import Client
+
+from helpers import BATCH_SIZE
+from models import URLMap
+
+
+def validate_fields(url_map):
+    """
+    Validate a mapping like URLMap.clean_fields, raising a ValidationError,
+    except for whether its object exists, which is left to check_objects.
+    """
+    super(URLMap, url_map).clean_fields(exclude=['content_type'])
+    url_map._validate_key()
+    url_map._validate_single_mapping()
+    url_map._validate_url()
+    url_map._validate_view()
+
+
+def identify(url_map):
+    """
+    Return the (key, site ID, language) that identifies a mapping.
+    """
+    return url_map.key, url_map.site_id, url_map.language
+
+
+def describe(identity):
+    """
+    Describe a (key, site ID, language) tuple for reports.
+    """
+    key, site_id, language = identity
+    return u"{key} ({site}, {language})".format(
+        key=key,
+        site="site {id}".format(id=site_id) if site_id else "all sites",
+        language=(
+            "language {code}".format(code=language) if language
+            else "all languages"
+        )
+    )
+
+
+def check_objects(url_maps, errors):
+    """
+    Fetch the objects of object mappings with one query per content type and
+    batch, caching each on its mapping and adding an (identity, message) tuple
+    to errors for each mapping whose object does not exist or has no URL.
+    """
+    by_content_type = {}
+    for url_map in url_maps:
+        if url_map.content_type_id is not None or url_map.object_id is not None:
+            if url_map.content_type_id is None or url_map.object_id is None:
+                errors.append((
+                    identify(url_map),
+                    "Please supply both a content type and object ID."
+                ))
+                continue
+            # Cached, so that validating the mapping makes no query
+            url_map.content_type = ContentType.objects.get_for_id(
+                url_map.content_type_id
+            )
+            by_content_type.setdefault(url_map.content_type_id, []).append(url_map)
+
+    for content_type_id, mapped in by_content_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        for i in range(0, len(mapped), BATCH_SIZE):
+            batch = mapped[i:i + BATCH_SIZE]
+            objects = model._default_manager.in_bulk(
+                [url_map.object_id for url_map in batch]
+            )
+            for url_map in batch:
+                obj = objects.get(url_map.object_id)
+                if obj is None:
+                    errors.append((identify(url_map), "Object does not exist"))
+                elif getattr(obj, 'get_absolute_url', None) is None:
+                    errors.append((
+                        identify(url_map),
+                        "Object has no get_absolute_url method"
+                    ))
+                else:
+                    setattr(url_map, URLMap.content_object.cache_attr, obj)
+
+
+def get_default_host():
+    """
+    Return the domain of the current site, if the sites framework is
+    installed, to fetch URLs from, or None.
+    """
+    if 'django.contrib.sites' not in django_settings.INSTALLED_APPS:
+        return None
+    from django.contrib.sites.models import Site
+    return Site.objects.get_current().domain
+
+
+def _check_status(url, host=None):
+    # Absolute URLs point at other sites, which the test client cannot fetch
+    if '://' in url or url.startswith('//'):
+        return None
+    # Otherwise the client sends Host: testserver, which ALLOWED_HOSTS rejects
+    extra = {'HTTP_HOST': host} if host else {}
+    try:
+        status_code = Client().get(url, **extra).status_code
+    except Exception as e:
+        return "Fetching {url} raised {error!r}".format(url=url, error=e)
+    if status_code >= 400:
+        return "{url} returned {status}".format(url=url, status=status_code)
+    return None
+
+
+def check_mapping(url_map, check_status=False, host=None):
+    """
+    Return a list of the problems with a mapping whose object, if any, has
+    been fetched by check_objects. If check_status is True, its URL is
+    fetched from the given host.
+    """
+    try:
+        validate_fields(url_map)
+    except ValidationError as e:
+        return e.messages
+    problems = []
+    stored_url = url_map.get_stored_url()
+    if stored_url != url_map.resolved_url:
+        problems.append(
+            "Resolved URL {old} is out of date, now {new}; run "
+            "urlmapper_refresh".format(old=url_map.resolved_url, new=stored_url)
+        )
+    url = url_map.get_url()
+    if check_status and url:
+        problem = _check_status(url, host)
+        if problem is not None:
+            problems.append(problem)
+    return problems
+
+
+def check_mappings(queryset=None, workers=4, check_status=False, host=None):
+    """
+    Check the given mappings (by default, all of them) with the same rules as
+    URLMap.clean_fields, and optionally that their URLs can be fetched with
+    the test client from the given host, by default the current site's
+    domain. Objects are fetched in batches, then mappings are checked in a
+    pool of worker threads.
+
+    Returns a list of (key, site ID, language, problems, seconds) tuples, one
+    per mapping.
+    """
+    if queryset is None:
+        queryset = URLMap.objects.all()
+    url_maps = list(queryset)
+    if check_status and host is None:
+        host = get_default_host()
+    object_errors = []
+    check_objects(url_maps, object_errors)
+    problems = {}
+    for identity, problem in object_errors:
+        problems.setdefault(identity, []).append(problem)
+
+    def check(url_map):
+        start = time.time()
+        identity = identify(url_map)
+        if identity in problems:
+            result = problems[identity]
+        else:
+            result = check_mapping(url_map, check_status, host)
+        return identity + (result, time.time() - start)
+
+    if workers <= 1:
+        return [check(url_map) for url_map in url_maps]
+
+    def check_batch(batch):
+        try:
+            return [check(url_map) for url_map in batch]
+        finally:
+            # Each worker thread has its own database connections, which are
+            # only opened to fetch URLs with the test client.
+            for connection in connections.all():
+                connection.close()
+
+    batch_size = len(url_maps) // (workers * 4) + 1
+    pool = ThreadPool(workers)
+    try:
+        batches = pool.map(check_batch, [
+            url_maps[i:i + batch_size]
+            for i in range(0, len(url_maps), batch_size)
+        ])
+    finally:
+        pool.close()
+        pool.join()
+    return [result for batch in batches for result in batch]
@@ -0,0 +1,98 @@
+import re
+
+from helpers import get_mapped_urls
+from models import URLMap
+from registry import is_valid_key
+
+
+PLACEHOLDER_PREFIX = 'urlmap:'
+
+# Keys in placeholders are made of letters, digits, underscores and hyphens
+PLACEHOLDER_RE = re.compile(re.escape(PLACEHOLDER_PREFIX) + r'([\w-]+)')
+
+# Longer placeholders cannot name a key, so are not held back between chunks
+MAX_PLACEHOLDER_LENGTH = (
+    len(PLACEHOLDER_PREFIX) + URLMap._meta.get_field('key').max_length
+)
+
+
+def _get_partial_length(content):
+    """
+    Return the length of the end of content that could be the start of a
+    placeholder prefix.
+    """
+    for length in range(len(PLACEHOLDER_PREFIX), 0, -1):
+        if content.endswith(PLACEHOLDER_PREFIX[:length]):
+            return length
+    return 0
+
+
+def _rewrite(content, request=None, encoding=None, final=True):
+    """
+    Replace the placeholders in content, looking up their keys in one go.
+
+    Returns the rewritten content and, unless final, the end of content that
+    could be part of a placeholder continued in the next chunk, unrewritten.
+    """
+    matches = list(PLACEHOLDER_RE.finditer(content))
+    end = len(content)
+    if not final:
+        if (
+            matches
+            and matches[-1].end() == end
+            and len(matches[-1].group(0)) < MAX_PLACEHOLDER_LENGTH
+        ):
+            end = matches.pop().start()
+        else:
+            end -= _get_partial_length(content)
+    if not matches:
+        return content[:end], content[end:]
+
+    # Invalid keys are left as they are rather than raising, since they are
+    # most likely typed by editors.
+    keys = set(
+        match.group(1) for match in matches if is_valid_key(match.group(1))
+    )
+    urls = get_mapped_urls(keys, request) if keys else {}
+    parts = []
+    position = 0
+    for match in matches:
+        key = match.group(1)
+        if key not in urls:
+            continue
+        url = urls[key] or u''
+        if encoding is not None:
+            url = url.encode(encoding)
+        parts.append(content[position:match.start()])
+        parts.append(url)
+        position = match.end()
+    parts.append(content[position:end])
+    return content[:0].join(parts), content[end:]
+
+
+def rewrite_placeholders(content, request=None, encoding=None):
+    """
+    Replace placeholders such as urlmap:terms-and-conditions in content with
+    the URLs of their keys, looking up all the keys in one go. Placeholders
+    for invalid keys are left as they are.
+
+    If content is a bytestring, give the encoding to encode URLs with.
+    """
+    return _rewrite(content, request, encoding)[0]
+
+
+def rewrite_placeholder_chunks(chunks, request=None, encoding=None):
+    """
+    Like rewrite_placeholders, but for an iterable of chunks, yielding each as
+    it is rewritten. Only the end of a chunk that could be part of a
+    placeholder is held back until the next chunk arrives.
+    """
+    tail = None
+    for chunk in chunks:
+        if tail:
+            chunk = tail + chunk
+        content, tail = _rewrite(chunk, request, encoding, final=False)
+        if content:
+            yield content
+    if tail:
+        yield _rewrite(tail, request, encoding)[0]
@@ -0,0 +1,11 @@
+from helpers import get_mapping_version
+
+
+def mapped_url_version(request):
+    """
+    Add mapped_url_version, a token that changes whenever the mappings change,
+    to the context, e.g. to vary cached fragments on. It is only looked up if
+    it is used.
+    """
+    # Template variables call callables when they are resolved
+    return {'mapped_url_version': get_mapping_version}
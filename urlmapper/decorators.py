@@ -0,0 +1,80 @@
+from django.utils import translation
+
+from dispatch import get_current_site
+
+
+def _vary_on_user(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated():
+        return 'anonymous'
+    return user.pk
+
+
+def _vary_on_language(request):
+    return translation.get_language()
+
+
+def _vary_on_site(request):
+    return get_current_site(request).domain
+
+
+VARY_ON = {
+    'user': _vary_on_user,
+    'language': _vary_on_language,
+    'site': _vary_on_site,
+}
+
+
+class CachePolicy(object):
+    """
+    Describes how the URL returned by a mapping function may be cached.
+    """
+
+    def __init__(self, timeout=None, vary_on=()):
+        self.timeout = timeout
+        self.vary_on = []
+        for vary in vary_on:
+            if not callable(vary):
+                try:
+                    vary = VARY_ON[vary]
+                except KeyError:
+                    raise ValueError(
+                        "Cannot vary on '{vary}'; use one of {names} or a "
+                        "function of the request.".format(
+                            vary=vary,
+                            names=sorted(VARY_ON)
+                        )
+                    )
+            self.vary_on.append(vary)
+
+    def get_cache_key(self, key, request):
+        """
+        Return the key under which to cache the URL for this request.
+        """
+        cache_key = (key,) + tuple(vary(request) for vary in self.vary_on)
+        if request is None and self.vary_on:
+            # Functions are called without a request outside of requests, e.g.
+            # by check_mapped_url, and may return something different from
+            # what they return for any request, so cache that separately.
+            cache_key += (None,)
+        return cache_key
+
+
+def cache_mapping(timeout=None, vary_on=()):
+    """
+    Allow the URL returned by a function in URLMAPPER_FUNCTIONS to be cached.
+
+    By default the URL is cached until any URL map changes. Pass timeout to
+    expire it after that many seconds, and vary_on to cache a separate URL per
+    'user', 'language', 'site', or per value of a function of the request.
+
+        @cache_mapping(timeout=300, vary_on=['language'])
+        def get_terms_page(request):
+            ...
+    """
+    policy = CachePolicy(timeout, vary_on)
+
+    def decorator(function):
+        function.urlmapper_cache_policy = policy
+        return function
+    return decorator
@@ -0,0 +1,116 @@
+import functools
+import inspect
+
+from django.utils import translation
+
+
+def get_current_site(request):
+    """
+    Return the current site, or a RequestSite if the sites framework is not
+    installed. It is only imported when needed, since it is optional.
+    """
+    try:
+        from django.contrib.sites.shortcuts import get_current_site
+    except ImportError:  # Django < 1.7
+        from django.contrib.sites.models import get_current_site
+    return get_current_site(request)
+
+
+# Arguments that are passed to mapping functions that ask for them by name.
+INJECTED_ARGUMENTS = {
+    'language': lambda request: translation.get_language(),
+    'site': get_current_site,
+}
+
+
+def _get_argspec(function):
+    """
+    Return the argument names, and whether extra positional arguments are
+    accepted, for any callable. Returns None if the callable cannot be
+    introspected.
+    """
+    skip = 0
+    if isinstance(function, functools.partial):
+        spec = _get_argspec(function.func)
+        if spec is None:
+            return None
+        arg_names, varargs = spec
+        arg_names = [
+            name for name in arg_names[len(function.args):]
+            if name not in (function.keywords or {})
+        ]
+        return arg_names, varargs
+    if inspect.isclass(function):
+        function = function.__init__
+        skip = 1
+    elif not (inspect.isfunction(function) or inspect.ismethod(function)):
+        function = getattr(function, '__call__', None)
+        skip = 1
+    if inspect.ismethod(function) and function.__self__ is not None:
+        skip = 1
+    try:
+        arg_names, varargs, _, _ = inspect.getargspec(function)
+    except TypeError:
+        return None
+    return arg_names[skip:], varargs is not None
+
+
+def _call_legacy(function):
+    def dispatch(request):
+        try:
+            return function(request)
+        except TypeError:
+            return function()
+    return dispatch
+
+
+def compile_function(function):
+    """
+    Return a function of the request that calls a mapping function with the
+    arguments its signature asks for.
+
+    The request is passed as the first argument that is not one of
+    INJECTED_ARGUMENTS, which are passed by name.
+    """
+    spec = _get_argspec(function)
+    if spec is None:
+        # Built-in callables cannot be introspected, so fall back to trying
+        # with and without the request.
+        return _call_legacy(function)
+    arg_names, varargs = spec
+
+    injected = [
+        (name, INJECTED_ARGUMENTS[name])
+        for name in arg_names if name in INJECTED_ARGUMENTS
+    ]
+    request_names = [
+        name for name in arg_names if name not in INJECTED_ARGUMENTS
+    ]
+
+    if request_names:
+        request_name = request_names[0]
+
+        def dispatch(request):
+            kwargs = dict((name, get(request)) for name, get in injected)
+            kwargs[request_name] = request
+            return function(**kwargs)
+    elif varargs:
+        def dispatch(request):
+            kwargs = dict((name, get(request)) for name, get in injected)
+            return function(request, **kwargs)
+    else:
+        def dispatch(request):
+            kwargs = dict((name, get(request)) for name, get in injected)
+            return function(**kwargs)
+    return dispatch
+
+
+def compile_functions(functions):
+    """
+    Return a dispatch table of compiled functions, for a dictionary of keys to
+    mapping functions.
+    """
+    return dict(
+        (key, compile_function(function))
+        for key, function in functions.items()
+    )
@@ -1,35 +1,473 @@
-from models import URLMap
-from django.conf import settings
+import time
 
+from django.conf import settings as django_settings
+from django.db.models.query import prefetch_related_objects
+from django.utils import translation
 
-def get_mapped_url(key, request=None):
+from budget import DATABASE_SOURCES
+from memo import get_memo
+from metrics import count_queries
+from models import URLMap, get_candidate_partitions
+from registry import get_keys, is_valid_key
+from snapshot import get_snapshot, snapshot_key
+
+import budget
+import cache
+import settings
+
+
+# SQLite allows at most 999 parameters per query, so large batches of keys are
+# looked up in chunks of this size.
+BATCH_SIZE = 500
+
+
+def _check_key(key):
     """
-    Return the URL for a given key, or None if one does not exist.
+    Return whether the key is valid, raising a KeyError if not and exceptions
+    are enabled.
     """
-    if key not in settings.URLMAPPER_KEYS:
-        if settings.URLMAPPER_RAISE_EXCEPTION:
-            raise KeyError(
-                "Key '{key}' does not exist in settings.URLMAPPER_KEYS".format(
-                    key=key
-                )
+    if is_valid_key(key):
+        return True
+    if settings.URLMAPPER_RAISE_EXCEPTION:
+        raise KeyError(
+            "Key '{key}' does not exist in settings.URLMAPPER_KEYS".format(
+                key=key
             )
+        )
+    return False
+
+
+def _call_function(key, request):
+    policy = getattr(
+        settings.URLMAPPER_FUNCTIONS[key], 'urlmapper_cache_policy', None
+    )
+    if policy is None:
+        return settings.FUNCTION_DISPATCH[key](request)
+    cache_key = policy.get_cache_key(key, request)
+    url = cache.get_url(cache_key)
+    if url is cache.MISSING:
+        url = settings.FUNCTION_DISPATCH[key](request)
+        cache.set_url(cache_key, url, policy.timeout)
+    return url
+
+
+def _get_function_url(key, request):
+    try:
+        return _call_function(key, request)
+    except Exception, e:
+        if settings.URLMAPPER_RAISE_EXCEPTION:
+            raise e
+        if settings.METRICS_BACKEND is not None:
+            settings.METRICS_BACKEND.record_exception(key, e)
         return ''
 
+
+def _get_source(url_map):
+    if url_map.url:
+        return 'url'
+    if url_map.content_type_id is not None:
+        return 'object'
+    return 'view'
+
+
+def _is_cacheable(url_map):
+    # The target of an object mapping can change without the mapping itself
+    # being saved, so object mappings are only cached if their objects are
+    # watched for changes.
+    return url_map.content_type_id is None or url_map.is_watched()
+
+
+def _can_memoize(memo, key, request):
+    # Function mappings may depend on the request, so are only memoized for
+    # the request the memo belongs to.
+    return memo is not None and (
+        key not in settings.URLMAPPER_FUNCTIONS or request is memo.request
+    )
+
+
+def _get_snapshot_url(key, partition):
+    """
+    Return the URL for a key from the snapshot, '' if the key is not in the
+    snapshot and there is no fallback to the database, or MISSING if there is
+    no snapshot to serve it.
+    """
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return cache.MISSING
+    mappings = snapshot.get_mappings()
     if key in settings.URLMAPPER_FUNCTIONS:
+        return mappings.get(key, cache.MISSING)
+    for site_id, language in get_candidate_partitions(partition):
+        url = mappings.get(snapshot_key(key, site_id, language), cache.MISSING)
+        if url is not cache.MISSING:
+            return url
+    if settings.URLMAPPER_SNAPSHOT.get('FALLBACK', False):
+        return cache.MISSING
+    return ''
+
+
+def _get_url(key, request, partition):
+    """
+    Return the URL for a valid key and where it came from, as one of the
+    sources in metrics.
+    """
+    url = _get_snapshot_url(key, partition)
+    if url is not cache.MISSING:
+        return url, 'snapshot'
+
+    if key in settings.URLMAPPER_FUNCTIONS:
+        return _get_function_url(key, request), 'function'
+
+    cache_key = cache.partition_key(key, partition)
+    url = cache.get_url(cache_key)
+    if url is not cache.MISSING:
+        return url, 'cache'
+
+    url_map = URLMap.objects.get_best_matches([key], partition).get(key)
+    if url_map is None:
+        url, source = '', 'unmapped'
+    else:
+        url, source = url_map.get_resolved_url(), _get_source(url_map)
+        if not _is_cacheable(url_map):
+            return url, source
+    cache.set_url(cache_key, url)
+    return url, source
+
+
+def _get_mapped_url(key, request):
+    if not _check_key(key):
+        return '', 'invalid'
+
+    partition = cache.get_partition()
+    memo = get_memo()
+    if memo is not None and request is None:
+        request = memo.request
+    if not _can_memoize(memo, key, request):
+        return _get_url(key, request, partition)
+    memo_key = cache.partition_key(key, partition)
+    if memo_key in memo:
+        return memo[memo_key], 'memo'
+    memo[memo_key], source = _get_url(key, request, partition)
+    return memo[memo_key], source
+
+
+def _get_db_urls(keys, timings=None, sources=None, partition=None):
+    """
+    Return a dictionary of URLs for keys that are mapped in the database,
+    caching them, by default for the current partition. If a dictionary of
+    timings is given, the seconds taken to resolve each mapping are added to
+    it, and likewise for where each URL came from if a dictionary of sources
+    is given.
+    """
+    if partition is None:
+        partition = cache.get_partition()
+    urls = {}
+    for i in range(0, len(keys), BATCH_SIZE):
+        batch = dict.fromkeys(keys[i:i + BATCH_SIZE], '')
+        url_maps = URLMap.objects.get_best_matches(
+            batch.keys(), partition
+        ).values()
+        prefetch_related_objects(
+            [
+                url_map for url_map in url_maps
+                if url_map.content_type_id is not None
+                and not url_map.is_watched()
+            ],
+            ['content_object']
+        )
+        uncacheable = set()
+        for url_map in url_maps:
+            start = time.time()
+            batch[url_map.key] = url_map.get_resolved_url()
+            if timings is not None:
+                timings[url_map.key] = time.time() - start
+            if sources is not None:
+                sources[url_map.key] = _get_source(url_map)
+            if not _is_cacheable(url_map):
+                uncacheable.add(url_map.key)
+        urls.update(batch)
+        if sources is not None:
+            sources.update(
+                (key, 'unmapped') for key in batch if key not in sources
+            )
+        cache.set_urls(
+            dict(
+                (cache.partition_key(key, partition), url)
+                for key, url in batch.items()
+                if key not in uncacheable
+            )
+        )
+    return urls
+
+
+def get_mapped_url(key, request=None):
+    """
+    Return the URL for a given key, or None if one does not exist.
+    """
+    backend = settings.METRICS_BACKEND
+    tracking = budget.get_logs()
+    if backend is None and not tracking:
+        return _get_mapped_url(key, request)[0]
+
+    queries = count_queries()
+    start = time.time()
+    url, source = _get_mapped_url(key, request)
+    seconds = time.time() - start
+    if queries is not None:
+        queries = count_queries() - queries
+    if backend is not None:
+        backend.record_lookup(key, source, seconds, queries)
+    if tracking and source in DATABASE_SOURCES:
+        budget.record([key])
+    return url
+
+
+def get_mapped_urls(keys, request=None):
+    """
+    Return a dictionary of URLs for the given keys.
+
+    Database mappings are fetched in a single query, plus one query per
+    content type for object mappings whose objects are not watched for changes.
+    """
+    partition = cache.get_partition()
+    memo = get_memo()
+    if memo is not None and request is None:
+        request = memo.request
+
+    urls = {}
+    sources = {}
+    db_keys = set()
+    for key in keys:
+        if key in urls or key in db_keys:
+            continue
+        if not _check_key(key):
+            urls[key], sources[key] = '', 'invalid'
+            continue
+        memo_key = cache.partition_key(key, partition)
+        if _can_memoize(memo, key, request) and memo_key in memo:
+            urls[key], sources[key] = memo[memo_key], 'memo'
+            continue
+        url = _get_snapshot_url(key, partition)
+        if url is not cache.MISSING:
+            urls[key], sources[key] = url, 'snapshot'
+        elif key in settings.URLMAPPER_FUNCTIONS:
+            urls[key] = _get_function_url(key, request)
+            sources[key] = 'function'
+        else:
+            db_keys.add(key)
+
+    cached_urls = dict(
+        (cache_key[0], url) for cache_key, url in cache.get_urls(
+            [cache.partition_key(key, partition) for key in db_keys]
+        ).items()
+    )
+    urls.update(cached_urls)
+    sources.update((key, 'cache') for key in cached_urls)
+    db_keys = list(db_keys - set(cached_urls))
+
+    urls.update(_get_db_urls(db_keys, sources=sources, partition=partition))
+    if db_keys:
+        budget.record(sorted(db_keys))
+
+    backend = settings.METRICS_BACKEND
+    if backend is not None:
+        for key, source in sources.items():
+            backend.record_lookup(key, source, None, None)
+
+    if memo is not None:
+        memo.update(
+            (cache.partition_key(key, partition), url)
+            for key, url in urls.items()
+            if is_valid_key(key)
+            and _can_memoize(memo, key, request)
+        )
+    return urls
+
+
+def get_static_keys():
+    """
+    Return the keys whose URLs are the same for every request: all keys that
+    are not mapped to functions, and those whose functions are cached without
+    varying.
+    """
+    keys = []
+    for key in sorted(get_keys()):
+        function = settings.URLMAPPER_FUNCTIONS.get(key)
+        if function is not None:
+            policy = getattr(function, 'urlmapper_cache_policy', None)
+            if policy is None or policy.vary_on:
+                continue
+        keys.append(key)
+    return keys
+
+
+def get_warm_languages():
+    """
+    Return the languages to warm the caches in, least used first: those that
+    mappings are made for and, last, LANGUAGE_CODE, which requests use unless
+    another language is activated.
+    """
+    languages = []
+    if django_settings.USE_I18N:
+        languages.extend(sorted(
+            URLMap.objects.exclude(
+                language=''
+            ).values_list('language', flat=True).distinct()
+        ))
+    language_code = django_settings.LANGUAGE_CODE
+    return [
+        language for language in languages if language != language_code
+    ] + [language_code]
+
+
+def warm_cache(keys=None, languages=None):
+    """
+    Resolve the given keys, by default those returned by get_static_keys, and
+    fill the configured caches with their URLs for the current site in each of
+    the given languages, by default those returned by get_warm_languages.
+    Functions are called first, then database mappings are looked up in
+    batches, once per language, so that if the local cache fills up, the last
+    language's URLs are the ones kept.
+
+    Returns a list of (key, language, url, seconds, exception) tuples, where
+    exception is whatever the key's mapping function raised, or None. Function
+    mappings are called once, so their language is None.
+    """
+    if keys is None:
+        keys = get_static_keys()
+    if languages is None:
+        languages = get_warm_languages()
+    results = []
+    for key in keys:
+        if key not in settings.URLMAPPER_FUNCTIONS:
+            continue
+        start = time.time()
         try:
-            try:
-                return settings.URLMAPPER_FUNCTIONS[key](request)
-            except TypeError:
-                return settings.URLMAPPER_FUNCTIONS[key]()
-        except Exception, e:
-            if settings.URLMAPPER_RAISE_EXCEPTION:
-                raise e
-            return ''
+            url, error = _call_function(key, None), None
+        except Exception as e:
+            url, error = '', e
+        results.append((key, None, url, time.time() - start, error))
 
-    try:
-        return URLMap.objects.get(key=key).get_url()
-    except URLMap.DoesNotExist:
-        return ''
+    db_keys = [key for key in keys if key not in settings.URLMAPPER_FUNCTIONS]
+    for language in languages:
+        timings = {}
+        # Views are reversed, and the partition taken, in the language
+        with translation.override(language):
+            urls = _get_db_urls(db_keys, timings)
+        results.extend(
+            (key, language, urls[key], timings.get(key, 0), None)
+            for key in db_keys
+        )
+    return results
+
+
+def _get_function_keys_by_url():
+    """
+    Return a dictionary of URLs to the keys of the functions that return them
+    for every request, indexed until the first of the functions' URLs expires.
+    """
+    index = cache.get_index(('functions',))
+    if index is not cache.MISSING:
+        return index
+    index = {}
+    timeouts = []
+    for key in get_static_keys():
+        if key not in settings.URLMAPPER_FUNCTIONS:
+            continue
+        try:
+            url = _call_function(key, None)
+        except Exception:
+            continue
+        index.setdefault(url, set()).add(key)
+        timeout = settings.URLMAPPER_FUNCTIONS[key].urlmapper_cache_policy.timeout
+        if timeout is not None:
+            timeouts.append(timeout)
+    cache.set_index(
+        ('functions',), index, min(timeouts) if timeouts else None
+    )
+    return index
+
+
+def _get_db_keys_by_url(partition):
+    """
+    Return a dictionary of URLs to the keys whose best matching mappings for a
+    partition have them. The URLs of mappings that can be cached are indexed
+    with a single query until the mappings change; those of object mappings
+    whose objects are not watched are resolved afresh on each call, with a
+    query for the mappings and one for each type of object.
+    """
+    index_key = ('urls',) + partition
+    cached = cache.get_index(index_key)
+    if cached is cache.MISSING:
+        cached = _build_db_index(partition)
+        cache.set_index(index_key, cached)
+    index, unwatched = cached
+    if not unwatched:
+        return index
+    url_maps = list(URLMap.objects.filter(pk__in=unwatched))
+    prefetch_related_objects(url_maps, ['content_object'])
+    index = dict((url, set(keys)) for url, keys in index.items())
+    for url_map in url_maps:
+        index.setdefault(url_map.get_url(), set()).add(url_map.key)
+    return index
+
+
+def _build_db_index(partition):
+    """
+    Return an (index, unwatched) tuple for a partition, where index is a
+    dictionary of URLs to the keys of the best matching mappings that can be
+    cached, and unwatched is a list of the primary keys of the rest.
+    """
+    candidates = get_candidate_partitions(partition)
+    matches = {}
+    for url_map in URLMap.objects.filter(
+        site_id__in=set(site_id for site_id, language in candidates),
+        language__in=set(language for site_id, language in candidates)
+    ).only(
+        'key', 'site_id', 'language', 'resolved_url', 'url', 'content_type',
+        'view_name', 'view_keywords'
+    ):
+        rank = candidates.index((url_map.site_id, url_map.language))
+        if url_map.key not in matches or rank < matches[url_map.key][0]:
+            matches[url_map.key] = (rank, url_map)
+    index = {}
+    unwatched = []
+    for key, (rank, url_map) in matches.items():
+        if not _is_cacheable(url_map):
+            unwatched.append(url_map.pk)
+            continue
+        # Views are reversed for the current language and script prefix
+        url = (
+            url_map.get_resolved_url() if url_map.is_view_mapping()
+            else url_map.resolved_url
+        )
+        index.setdefault(url, set()).add(key)
+    return index, unwatched
+
+
+def get_keys_for_url(url):
+    """
+    Return a sorted list of the keys whose URLs are the given URL for the
+    current site and language: keys mapped in the database, and keys whose
+    functions return the same URL for every request.
+
+    The first lookup for a site and language indexes every mapping by its
+    resolved URL, and the index is kept until the mappings change. Object
+    mappings that are not in URLMAPPER_CONTENTTYPES are left out of the index
+    and found by their objects' current URLs.
+    """
+    return sorted(
+        _get_db_keys_by_url(cache.get_partition()).get(url, frozenset()) |
+        _get_function_keys_by_url().get(url, frozenset())
+    )
+
+
+def get_mapping_version():
+    """
+    Return a token that changes whenever a mapping, or a mapped object in
+    URLMAPPER_CONTENTTYPES, changes, for use in cache keys.
+    """
+    return cache.get_version()
 
 
 def check_mapped_url(key):
@@ -37,10 +475,6 @@ def check_mapped_url(key):
     Check whether a URL is mapped.
     """
     return bool(
-        key in settings.URLMAPPER_KEYS
-        and (
-            key in settings.URLMAPPER_FUNCTIONS
-            or URLMap.objects.filter(key=key).exists()
-        )
+        is_valid_key(key)
         and get_mapped_url(key)
     )
@@ -0,0 +1,75 @@
+import time
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand, CommandError
+
+from ...checks import check_mappings, describe
+
+
+class Command(NoArgsCommand):
+    help = (
+        "Check every mapping with the same rules as the admin, reporting "
+        "mappings whose targets no longer exist or whose resolved URLs are out "
+        "of date. Exits with an error if any mapping has a problem."
+    )
+    option_list = NoArgsCommand.option_list + (
+        make_option(
+            '--workers',
+            type='int',
+            default=4,
+            help="Number of threads to check mappings in (default 4)"
+        ),
+        make_option(
+            '--status',
+            action='store_true',
+            default=False,
+            help="Also fetch each URL with the test client and check its status"
+        ),
+        make_option(
+            '--host',
+            help="Host to fetch URLs from with --status (default: the "
+                 "current site's domain)"
+        ),
+    )
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+        start = time.time()
+        results = check_mappings(
+            workers=options['workers'],
+            check_status=options['status'],
+            host=options.get('host')
+        )
+        elapsed = time.time() - start
+
+        failed = 0
+        for key, site_id, language, problems, seconds in results:
+            mapping = describe((key, site_id, language))
+            if problems:
+                failed += 1
+                for problem in problems:
+                    self.stderr.write(u"{mapping}: {problem}".format(
+                        mapping=mapping, problem=problem
+                    ))
+            if verbosity >= 2:
+                self.stdout.write(u"{ms:9.2f}ms  {mapping}".format(
+                    ms=seconds * 1000, mapping=mapping
+                ))
+
+        if verbosity >= 1:
+            self.stdout.write(
+                "Checked {n} mapping(s) in {seconds:.2f}s, {failed} with "
+                "problems.".format(n=len(results), seconds=elapsed, failed=failed)
+            )
+            slowest = sorted(results, key=lambda result: -result[4])[:5]
+            if slowest:
+                self.stdout.write("Slowest: {keys}".format(keys=', '.join(
+                    u"{mapping} {ms:.2f}ms".format(
+                        mapping=describe(result[:3]), ms=result[4] * 1000
+                    )
+                    for result in slowest
+                )))
+        if failed:
+            raise CommandError(
+                "{failed} mapping(s) failed checks".format(failed=failed)
+            )
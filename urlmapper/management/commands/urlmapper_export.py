@@ -0,0 +1,32 @@
+import sys
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...transfer import export_rows, write_csv, write_json
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every mapping in the database as JSON or CSV, to the given "
+        "path or standard output."
+    )
+    args = '[path]'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--format',
+            choices=['json', 'csv'],
+            default='json',
+            help="Output format: json (default) or csv"
+        ),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) > 1:
+            raise CommandError("Give at most one path")
+        write = write_csv if options['format'] == 'csv' else write_json
+        if args:
+            with open(args[0], 'wb') as stream:
+                write(export_rows(), stream)
+        else:
+            write(export_rows(), self.stdout)
@@ -0,0 +1,55 @@
+import time
+from optparse import make_option
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import LabelCommand, CommandError
+
+from ...transfer import import_rows, read_csv, read_json
+
+
+class Command(LabelCommand):
+    help = (
+        "Create or update mappings from a JSON or CSV file, as written by "
+        "urlmapper_export. Nothing is written unless every row is valid."
+    )
+    args = '<path>'
+    label = 'path'
+    option_list = LabelCommand.option_list + (
+        make_option(
+            '--format',
+            choices=['json', 'csv'],
+            default=None,
+            help="Input format: json or csv (by default, from the extension)"
+        ),
+    )
+
+    def handle_label(self, path, **options):
+        verbosity = int(options.get('verbosity', 1))
+        format = options.get('format') or (
+            'csv' if path.lower().endswith('.csv') else 'json'
+        )
+        read = read_csv if format == 'csv' else read_json
+        start = time.time()
+        with open(path, 'rb') as stream:
+            try:
+                created, updated = import_rows(read(stream))
+            except ValidationError as e:
+                raise CommandError(
+                    "Nothing imported from {path}:\n{errors}".format(
+                        path=path,
+                        errors='\n'.join(e.messages)
+                    )
+                )
+            except ValueError as e:
+                raise CommandError(
+                    "Could not read {path}: {error}".format(path=path, error=e)
+                )
+        if verbosity >= 1:
+            self.stdout.write(
+                "Created {created} and updated {updated} mapping(s) in "
+                "{seconds:.2f}s".format(
+                    created=created,
+                    updated=updated,
+                    seconds=time.time() - start
+                )
+            )
@@ -0,0 +1,19 @@
+from django.core.management.base import NoArgsCommand
+
+from ...models import refresh_resolved_urls
+
+
+class Command(NoArgsCommand):
+    help = (
+        "Resolve the URL of every URL map again, e.g. after the URLconf or "
+        "mapped objects have changed."
+    )
+
+    def handle_noargs(self, **options):
+        changed = refresh_resolved_urls()
+        if int(options.get('verbosity', 1)) >= 1:
+            for key in changed:
+                self.stdout.write("Updated {key}".format(key=key))
+            self.stdout.write(
+                "{n} URL map(s) updated.".format(n=len(changed))
+            )
@@ -0,0 +1,52 @@
+from django.core.management.base import LabelCommand
+from django.db.models.query import prefetch_related_objects
+
+from ... import settings
+from ...helpers import get_static_keys
+from ...models import URLMap
+from ...snapshot import snapshot_key, write
+
+
+class Command(LabelCommand):
+    help = (
+        "Write the URLs of all keys that do not depend on the request to a "
+        "snapshot file, for use with URLMAPPER_SNAPSHOT."
+    )
+    args = '<path>'
+    label = 'path'
+
+    def handle_label(self, path, **options):
+        verbosity = int(options.get('verbosity', 1))
+        keys = set(get_static_keys())
+
+        # Resolve from the database and functions directly, rather than from
+        # any snapshot that is currently configured.
+        mappings = dict.fromkeys(
+            keys - set(settings.URLMAPPER_FUNCTIONS), ''
+        )
+        url_maps = [
+            url_map for url_map in URLMap.objects.all() if url_map.key in keys
+        ]
+        prefetch_related_objects(
+            [url_map for url_map in url_maps if url_map.content_type_id],
+            ['content_object']
+        )
+        for url_map in url_maps:
+            mappings[snapshot_key(
+                url_map.key, url_map.site_id, url_map.language
+            )] = url_map.get_url()
+
+        for key in keys & set(settings.URLMAPPER_FUNCTIONS):
+            try:
+                mappings[key] = settings.FUNCTION_DISPATCH[key](None)
+            except Exception as e:
+                # Left out of the snapshot, so the function is called instead
+                self.stderr.write(
+                    "Could not resolve {key}: {error!r}".format(key=key, error=e)
+                )
+
+        write(path, mappings)
+        if verbosity >= 1:
+            self.stdout.write(
+                "Wrote {n} mapping(s) to {path}".format(n=len(mappings), path=path)
+            )
@@ -0,0 +1,74 @@
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...helpers import warm_cache
+from ... import cache
+
+
+def _describe(key, language):
+    if language is None:
+        return key
+    return u"{key} ({language})".format(key=key, language=language)
+
+
+class Command(BaseCommand):
+    help = (
+        "Resolve mapped URLs in bulk and fill the configured caches for the "
+        "current site in LANGUAGE_CODE and each language mapped. By default, "
+        "every key that does not depend on the request is resolved."
+    )
+    args = '[key key ...]'
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--language',
+            action='append',
+            dest='languages',
+            help="Only warm the caches for this language (may be repeated)"
+        ),
+    )
+
+    def handle(self, *keys, **options):
+        if cache.get_shared_cache() is None:
+            # The local cache would be filled in this process only
+            raise CommandError(
+                "URLMAPPER_CACHE is not set, so warming would not reach the "
+                "processes serving requests. Set URLMAPPER_CACHE, or "
+                "URLMAPPER_WARM_ON_STARTUP to warm each process as it starts."
+            )
+        verbosity = int(options.get('verbosity', 1))
+        start = time.time()
+        results = warm_cache(keys or None, options.get('languages'))
+        elapsed = time.time() - start
+
+        unmapped = []
+        failed = []
+        for key, language, url, seconds, error in results:
+            if error is not None:
+                failed.append((key, error))
+            elif not url:
+                unmapped.append(_describe(key, language))
+            if verbosity >= 1:
+                self.stdout.write(
+                    u"{ms:9.2f}ms  {key} -> {url}".format(
+                        ms=seconds * 1000,
+                        key=_describe(key, language),
+                        url=url if error is None else "(failed)"
+                    )
+                )
+
+        if unmapped and verbosity >= 1:
+            self.stdout.write("Unmapped: {keys}".format(keys=', '.join(unmapped)))
+        for key, error in failed:
+            self.stderr.write(
+                "Failed to resolve {key}: {error!r}".format(key=key, error=error)
+            )
+        if verbosity >= 1:
+            self.stdout.write(
+                "Warmed {n} URL(s) in {seconds:.2f}s, {failed} failed.".format(
+                    n=len(results),
+                    seconds=elapsed,
+                    failed=len(failed)
+                )
+            )
@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+import threading
+
+import cache
+
+
+_state = threading.local()
+
+
+class Memo(dict):
+    """
+    URLs resolved in the current thread, keyed by cache.partition_key. Function
+    mappings are only memoized for calls made with the memo's request.
+    """
+
+    def __init__(self, request=None):
+        super(Memo, self).__init__()
+        self.request = request
+
+
+def get_memo():
+    """
+    Return the Memo for the current thread, or None if nothing is being
+    memoized.
+    """
+    return getattr(_state, 'memo', None)
+
+
+def start(request=None):
+    """
+    Start memoizing URLs resolved in the current thread, discarding anything
+    memoized before.
+    """
+    _state.memo = Memo(request)
+    return _state.memo
+
+
+def finish():
+    """
+    Stop memoizing URLs in the current thread.
+    """
+    _state.__dict__.pop('memo', None)
+
+
+@contextmanager
+def memoize(urls=None):
+    """
+    Serve the given URLs, keyed by mapping key, to lookups made in the current
+    thread and partition for the duration of the block. Nested blocks share
+    the outermost memo, which is discarded when it exits.
+    """
+    memo = get_memo()
+    created = memo is None
+    if created:
+        memo = start()
+    partition = cache.get_partition()
+    memo.update(
+        (cache.partition_key(key, partition), url)
+        for key, url in (urls or {}).items()
+    )
+    try:
+        yield memo
+    finally:
+        if created:
+            finish()
@@ -0,0 +1,111 @@
+import threading
+import traceback
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import connection
+
+
+# Where a URL came from: the first three are hits, the rest misses
+HIT_SOURCES = ('memo', 'snapshot', 'cache')
+MISS_SOURCES = ('function', 'url', 'object', 'view', 'unmapped', 'invalid')
+
+
+def count_queries():
+    """
+    Return the number of queries made on the default database so far, or None
+    if queries are not being logged.
+    """
+    if not (settings.DEBUG or getattr(connection, 'use_debug_cursor', False)):
+        return None
+    return len(connection.queries)
+
+
+class BaseBackend(object):
+    """
+    Receives a record of every mapped URL lookup. Set URLMAPPER_METRICS_BACKEND
+    to the path of a subclass to send the records elsewhere.
+    """
+
+    def record_lookup(self, key, source, seconds, queries):
+        """
+        Record that the URL for a key was looked up from the given source.
+        seconds is None for keys looked up in batches, and queries is None if
+        queries are not being logged.
+        """
+        raise NotImplementedError
+
+    def record_exception(self, key, exception):
+        """
+        Record an exception raised by a mapping function and swallowed because
+        URLMAPPER_RAISE_EXCEPTION is False.
+        """
+        raise NotImplementedError
+
+
+class InMemoryBackend(BaseBackend):
+    """
+    Keep counts and timings for each key in the current process.
+    """
+
+    def __init__(self, max_exceptions=100):
+        self._lock = threading.Lock()
+        self.max_exceptions = max_exceptions
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.keys = defaultdict(lambda: {
+                'lookups': 0,
+                'hits': 0,
+                'misses': 0,
+                'seconds': 0.0,
+                'max_seconds': 0.0,
+                'queries': 0,
+            })
+            self.sources = defaultdict(lambda: {'lookups': 0, 'seconds': 0.0})
+            self.exceptions = deque(maxlen=self.max_exceptions)
+
+    def record_lookup(self, key, source, seconds, queries):
+        with self._lock:
+            stats = self.keys[key]
+            stats['lookups'] += 1
+            if source in HIT_SOURCES:
+                stats['hits'] += 1
+            else:
+                stats['misses'] += 1
+            if queries:
+                stats['queries'] += queries
+            source_stats = self.sources[source]
+            source_stats['lookups'] += 1
+            if seconds is not None:
+                stats['seconds'] += seconds
+                stats['max_seconds'] = max(stats['max_seconds'], seconds)
+                source_stats['seconds'] += seconds
+
+    def record_exception(self, key, exception):
+        with self._lock:
+            self.exceptions.append(
+                (key, ''.join(
+                    traceback.format_exception_only(type(exception), exception)
+                ).strip())
+            )
+
+    def get_report(self, limit=10):
+        """
+        Return the most looked up and slowest keys, the lookups and time spent
+        per source, and the most recent swallowed exceptions.
+        """
+        with self._lock:
+            keys = [dict(stats, key=key) for key, stats in self.keys.items()]
+            sources = [
+                dict(stats, source=source)
+                for source, stats in sorted(self.sources.items())
+            ]
+            exceptions = list(self.exceptions)
+        return {
+            'hottest': sorted(keys, key=lambda k: -k['lookups'])[:limit],
+            'slowest': sorted(keys, key=lambda k: -k['seconds'])[:limit],
+            'sources': sources,
+            'exceptions': exceptions,
+        }
@@ -0,0 +1,78 @@
+from content import rewrite_placeholder_chunks, rewrite_placeholders
+
+import budget
+import memo
+import settings
+
+
+class MappedURLMemoMiddleware(object):
+    """
+    Resolve each mapping at most once per request.
+
+    While a request is being handled, lookups made without a request (such as
+    check_mapped_url and the is_mapped_url filter) use the current request.
+    """
+
+    def process_request(self, request):
+        memo.start(request)
+
+    def process_response(self, request, response):
+        memo.finish()
+        return response
+
+
+class MappedURLLookupBudgetMiddleware(object):
+    """
+    Warn, or raise a LookupBudgetExceeded, when handling a request makes more
+    mapped URL lookups that go to the database than URLMAPPER_LOOKUP_BUDGET
+    allows.
+    """
+
+    def process_request(self, request):
+        if settings.URLMAPPER_LOOKUP_BUDGET:
+            request._urlmapper_lookups = budget.start(
+                settings.URLMAPPER_LOOKUP_BUDGET['MAX_LOOKUPS'],
+                request.path
+            )
+
+    def process_response(self, request, response):
+        log = getattr(request, '_urlmapper_lookups', None)
+        if log is not None:
+            budget.finish(log)
+            budget.check(
+                log, settings.URLMAPPER_LOOKUP_BUDGET.get('RAISE', False)
+            )
+        return response
+
+
+class MappedURLPlaceholderMiddleware(object):
+    """
+    Replace placeholders such as urlmap:terms-and-conditions in HTML responses
+    with the URLs of their keys. Streaming responses are rewritten chunk by
+    chunk as they are sent.
+
+    Compressed responses are left alone, so this must come after (be applied
+    before) GZipMiddleware.
+    """
+
+    def process_response(self, request, response):
+        if (
+            not response.get('Content-Type', '').startswith('text/html')
+            or response.has_header('Content-Encoding')
+        ):
+            return response
+        # HttpResponse.charset was added in Django 1.8
+        encoding = getattr(response, 'charset', None) or response._charset
+        if response.streaming:
+            response.streaming_content = rewrite_placeholder_chunks(
+                response.streaming_content, request, encoding
+            )
+            if response.has_header('Content-Length'):
+                del response['Content-Length']
+        else:
+            response.content = rewrite_placeholders(
+                response.content, request, encoding
+            )
+            if response.has_header('Content-Length'):
+                response['Content-Length'] = str(len(response.content))
+        return response
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.urlresolvers import reverse, NoReverseMatch
+from django.db import models, migrations
+
+
+def resolve_urls(apps, schema_editor):
+    # Historical models have no get_absolute_url, so mapped objects are
+    # fetched through the real ContentType model.
+    from django.contrib.contenttypes.models import ContentType
+
+    URLMap = apps.get_model('urlmapper', 'URLMap')
+    for url_map in URLMap._default_manager.all():
+        url = url_map.url
+        if not url and url_map.content_type_id and url_map.object_id:
+            try:
+                url = ContentType.objects.get_for_id(
+                    url_map.content_type_id
+                ).get_object_for_this_type(
+                    pk=url_map.object_id
+                ).get_absolute_url()
+            except (ObjectDoesNotExist, AttributeError):
+                url = ''
+        elif not url and url_map.view_name:
+            try:
+                url = reverse(
+                    url_map.view_name,
+                    kwargs=dict(
+                        [part.strip() for part in keyword.split('=', 1)]
+                        for keyword in url_map.view_keywords.split(',')
+                        if keyword.strip()
+                    )
+                )
+            except (NoReverseMatch, ValueError):
+                url = ''
+        URLMap._default_manager.filter(pk=url_map.pk).update(resolved_url=url)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urlmapper', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='urlmap',
+            name='resolved_url',
+            field=models.CharField(verbose_name='Resolved URL', max_length=255, editable=False, blank=True),
+            preserve_default=True,
+        ),
+        migrations.RunPython(resolve_urls, noop),
+    ]
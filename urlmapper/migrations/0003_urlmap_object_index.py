@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urlmapper', '0002_urlmap_resolved_url'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='urlmap',
+            index_together=set([('content_type', 'object_id')]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urlmapper', '0003_urlmap_object_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='urlmap',
+            name='url',
+            field=models.CharField(help_text='Enter a relative URL', max_length=255, verbose_name='URL', db_index=True, blank=True),
+        ),
+    ]
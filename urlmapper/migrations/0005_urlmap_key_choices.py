@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urlmapper', '0004_urlmap_url_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='urlmap',
+            name='key',
+            field=models.CharField(unique=True, max_length=64, verbose_name='Key'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urlmapper', '0005_urlmap_key_choices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='urlmap',
+            name='language',
+            field=models.CharField(help_text='Leave blank to use for every language', max_length=15, verbose_name='Language', blank=True),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='urlmap',
+            name='site_id',
+            field=models.PositiveIntegerField(default=0, help_text='Leave as 0 to use on every site', verbose_name='Site ID'),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='urlmap',
+            name='key',
+            field=models.CharField(max_length=64, verbose_name='Key'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='urlmap',
+            unique_together=set([('key', 'site_id', 'language')]),
+        ),
+    ]
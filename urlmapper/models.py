@@ -1,22 +1,45 @@
 from django.contrib.contenttypes.generic import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.core.urlresolvers import reverse, resolve, NoReverseMatch, Resolver404
+from django.core.urlresolvers import resolve, NoReverseMatch, Resolver404
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _, ugettext
 
+from memo import get_memo
+from registry import is_valid_key
+
+import cache
 import settings
 
 
-def _get_key_choices():
+_view_keywords_cache = cache.LRUCache(settings.URLMAPPER_LOCAL_CACHE_SIZE)
+
+
+def parse_view_keywords(view_keywords):
     """
-    Return all the keys that are not mapped to functions, as a list of choices.
+    Return a dictionary of keyword arguments from a string in the format
+    a=b, c=d, raising a ValueError if it is not in that format. Do not modify
+    the dictionary, as it is shared between calls.
     """
-    keys = list(
-        set(settings.URLMAPPER_KEYS) - set(settings.URLMAPPER_FUNCTIONS.keys())
-    )
-    if not keys:
-        return [('', ugettext("There are no defined keys"))]
-    return zip(keys, keys)
+    kwargs = _view_keywords_cache.get(view_keywords)
+    if kwargs is not cache.MISSING:
+        return kwargs
+    kwargs = {}
+    for keyword in view_keywords.split(','):
+        if not keyword.strip():
+            continue
+        name, separator, value = keyword.partition('=')
+        if not separator:
+            raise ValueError(
+                "Keyword '{keyword}' is not in the format a=b".format(
+                    keyword=keyword.strip()
+                )
+            )
+        kwargs[name.strip()] = value.strip()
+    _view_keywords_cache.set(view_keywords, kwargs)
+    return kwargs
 
 
 def _get_content_type_choices():
@@ -31,12 +54,60 @@ def _get_content_type_choices():
     return filters
 
 
+def _get_languages(language):
+    """
+    Return the languages whose mappings can be used for a language, best
+    first: the language, its generic language, then every language ('').
+    """
+    languages = [language]
+    generic = language.split('-')[0]
+    if generic != language:
+        languages.append(generic)
+    if language:
+        languages.append('')
+    return languages
+
+
+def get_candidate_partitions(partition):
+    """
+    Return the (site ID, language) partitions whose mappings can be used for
+    a partition, best first: mappings for the site come before those for
+    every site (0), then by language, from the language itself to its generic
+    language (e.g. en for en-gb) to every language ('').
+    """
+    site_id, language = partition
+    return [
+        (candidate_site_id, candidate_language)
+        for candidate_site_id in ([site_id, 0] if site_id else [0])
+        for candidate_language in _get_languages(language)
+    ]
+
+
 class URLMapVisibleMananger(models.Manager):
 
     def get_queryset(self):
         queryset = super(URLMapVisibleMananger, self).get_queryset()
         return queryset.exclude(key__in=settings.URLMAPPER_FUNCTIONS.keys())
 
+    def get_best_matches(self, keys, partition):
+        """
+        Return a dictionary of the mapping that best matches a (site ID,
+        language) partition for each of the keys that has one, in the order
+        of get_candidate_partitions, fetched in a single query.
+        """
+        candidates = get_candidate_partitions(partition)
+        matches = {}
+        for url_map in self.get_queryset().filter(
+            key__in=keys,
+            site_id__in=set(site_id for site_id, language in candidates),
+            language__in=set(language for site_id, language in candidates)
+        ):
+            rank = candidates.index((url_map.site_id, url_map.language))
+            best = matches.get(url_map.key)
+            if best is None or rank < best[0]:
+                matches[url_map.key] = (rank, url_map)
+        return dict((key, url_map) for key, (rank, url_map) in matches.items())
+
 
 class URLMap(models.Model):
     """
@@ -45,9 +116,20 @@ class URLMap(models.Model):
     """
     key = models.CharField(
         _("Key"),
-        max_length=64,
-        unique=True,
-        choices=_get_key_choices()
+        max_length=64
+    )
+
+    # Where the mapping applies: 0 and '' for every site and language
+    site_id = models.PositiveIntegerField(
+        _("Site ID"),
+        default=0,
+        help_text=_("Leave as 0 to use on every site")
+    )
+    language = models.CharField(
+        _("Language"),
+        max_length=15,
+        blank=True,
+        help_text=_("Leave blank to use for every language")
     )
 
     # Map to a URL
@@ -55,7 +137,8 @@ class URLMap(models.Model):
         _("URL"),
         max_length=255,
         help_text=_("Enter a relative URL"),
-        blank=True
+        blank=True,
+        db_index=True
     )
 
     # Map to an object
@@ -88,40 +171,58 @@ class URLMap(models.Model):
         blank=True
     )
 
+    # The URL as of the last save, so that it can be read without resolving
+    resolved_url = models.CharField(
+        _("Resolved URL"),
+        max_length=255,
+        blank=True,
+        editable=False
+    )
+
     objects = URLMapVisibleMananger()
     _objects = models.Manager()
 
     def __unicode__(self):
         return u"{key} --> {url}".format(
             key=self.key,
-            url=self.get_url()
+            url=self.get_resolved_url() if self.pk else self.get_url()
         )
 
     def _get_view_kwargs(self, raise_exception=True):
-        if not self.view_keywords:
-            return {}
         try:
-            return {
-                keyword.split('=')[0].strip(): keyword.split('=')[1].strip()
-                for keyword in self.view_keywords.split(',')
-                if keyword
-            }
-        except Exception as e:
+            return parse_view_keywords(self.view_keywords)
+        except ValueError as e:
             if raise_exception:
                 raise e
             return {}
 
     def _get_view_url(self, raise_exception=True):
         try:
-            return reverse(
+            return cache.cached_reverse(
                 self.view_name,
-                kwargs=self._get_view_kwargs(raise_exception=False)
+                self._get_view_kwargs(raise_exception=False)
             )
         except NoReverseMatch as e:
             if raise_exception:
                 raise e
             return ''
 
+    def _validate_key(self):
+        # Keys are validated here rather than with choices on the field, so
+        # that changing the keys does not change the model.
+        if (
+            not is_valid_key(self.key)
+            or self.key in settings.URLMAPPER_FUNCTIONS
+        ):
+            raise ValidationError(
+                ugettext(
+                    "Key {key} is not in URLMAPPER_KEYS or is mapped to a "
+                    "function."
+                ).format(
+                    key=self.key
+                )
+            )
+
     def _validate_url(self):
         if self.url:
             try:
@@ -208,8 +309,16 @@ class URLMap(models.Model):
                 )
             )
 
+    def is_watched(self):
+        content_type = ContentType.objects.get_for_id(self.content_type_id)
+        return (
+            (content_type.app_label, content_type.model)
+            in settings.WATCHED_CONTENTTYPES
+        )
+
     def clean_fields(self, exclude=None):
         super(URLMap, self).clean_fields(exclude=exclude)
+        self._validate_key()
         self._validate_single_mapping()
         self._validate_url()
         self._validate_object()
@@ -225,6 +334,41 @@ class URLMap(models.Model):
         return ''
     get_url.short_description = _('URL')
 
+    def is_view_mapping(self):
+        return (
+            not self.url
+            and self.content_type_id is None
+            and bool(self.view_name)
+        )
+
+    def get_stored_url(self):
+        """
+        Return the URL to store in resolved_url: the URL of a URL or object
+        mapping, or '' for a view mapping, since the URL of a view depends on
+        the active language and script prefix.
+        """
+        if self.is_view_mapping():
+            return ''
+        return self.get_url()
+
+    def get_resolved_url(self):
+        """
+        Return the URL as of the last save. Objects that are not in
+        URLMAPPER_CONTENTTYPES are not watched for changes, so the URLs of
+        their mappings are always resolved afresh, and views are reversed
+        (through the reverse cache) for the current request.
+        """
+        if self.is_view_mapping():
+            return self._get_view_url(raise_exception=False)
+        if self.content_type_id is not None and not self.is_watched():
+            return self.get_url()
+        return self.resolved_url
+    get_resolved_url.short_description = _('URL')
+
+    def save(self, *args, **kwargs):
+        self.resolved_url = self.get_stored_url()
+        super(URLMap, self).save(*args, **kwargs)
+
     def mapping_type(self):
         if self.url:
             return _("Direct")
@@ -235,5 +379,74 @@ class URLMap(models.Model):
     mapping_type.short_description = _("Mapping type")
 
     class Meta:
+        # Also the index that mappings are looked up by
+        unique_together = [('key', 'site_id', 'language')]
+        # Used to find the mappings to an object when it changes
+        index_together = [('content_type', 'object_id')]
         verbose_name = _("URL map")
         verbose_name_plural = _("URL maps")
+
+
+def clear_cached_urls():
+    """
+    Discard all cached and memoized URLs.
+    """
+    cache.clear()
+    memo = get_memo()
+    if memo is not None:
+        memo.clear()
+
+
+def refresh_resolved_urls(queryset=None):
+    """
+    Resolve the URLs of the given mappings (by default, all of them) again,
+    saving any that have changed. Returns the keys of the changed mappings.
+    """
+    reversed_again = queryset is None
+    if reversed_again:
+        queryset = URLMap._objects.all()
+        # The URLconf may have changed since the URLs were last resolved
+        cache.reverse_cache.clear()
+    changed = []
+    stale = []
+    for url_map in queryset.prefetch_related('content_object'):
+        url = url_map.get_stored_url()
+        if url != url_map.resolved_url:
+            URLMap._objects.using(queryset.db).filter(
+                pk=url_map.pk
+            ).update(resolved_url=url)
+            changed.append(url_map.key)
+        elif reversed_again and url_map.is_view_mapping():
+            # Views are not stored, but their cached URLs may be out of date
+            stale.append(url_map.key)
+    if changed or stale:
+        cache.delete_urls(changed + stale)
+        memo = get_memo()
+        if memo is not None:
+            changed_keys = set(changed + stale)
+            for key in memo.keys():
+                if key[0] in changed_keys:
+                    del memo[key]
+    return changed
+
+
+@receiver([post_save, post_delete], sender=URLMap)
+def _clear_url_cache(sender, **kwargs):
+    clear_cached_urls()
+
+
+@receiver([post_save, post_delete])
+def _refresh_object_mappings(sender, instance, raw=False, **kwargs):
+    """
+    Resolve the URLs of mappings to an object in URLMAPPER_CONTENTTYPES again
+    when the object is saved or deleted.
+    """
+    opts = sender._meta
+    if raw or (opts.app_label, opts.model_name) not in settings.WATCHED_CONTENTTYPES:
+        return
+    refresh_resolved_urls(
+        URLMap._objects.filter(
+            content_type=ContentType.objects.get_for_model(sender),
+            object_id=instance.pk
+        )
+    )
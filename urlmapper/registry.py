@@ -0,0 +1,74 @@
+import threading
+
+from django.utils.translation import ugettext
+
+import settings
+
+
+# Packages can provide keys through entry points in this group, each naming
+# an iterable of keys or a function that returns one.
+ENTRY_POINT_GROUP = 'urlmapper.keys'
+
+_lock = threading.Lock()
+_registered = set()
+_entry_point_keys = None
+_keys = None
+_keys_from = None
+
+
+def _load_entry_point_keys():
+    keys = set()
+    try:
+        # Imported when first needed, since importing it scans every
+        # installed distribution
+        from pkg_resources import iter_entry_points
+    except ImportError:
+        return keys
+    for entry_point in iter_entry_points(ENTRY_POINT_GROUP):
+        provided = entry_point.load()
+        keys.update(provided() if callable(provided) else provided)
+    return keys
+
+
+def register_keys(*keys):
+    """
+    Add keys to the registry, e.g. from an app's AppConfig.ready().
+    """
+    global _keys
+    with _lock:
+        _registered.update(keys)
+        _keys = None
+
+
+def get_keys():
+    """
+    Return a frozenset of every valid key: URLMAPPER_KEYS, keys registered
+    with register_keys and keys provided by entry points. It is built once,
+    and again only when keys are registered or the settings are reloaded.
+    """
+    global _keys, _keys_from, _entry_point_keys
+    keys = _keys
+    if keys is not None and _keys_from is settings.URLMAPPER_KEYS:
+        return keys
+    with _lock:
+        if _entry_point_keys is None:
+            _entry_point_keys = _load_entry_point_keys()
+        _keys_from = settings.URLMAPPER_KEYS
+        _keys = keys = frozenset(
+            settings.URLMAPPER_KEYS
+        ) | _registered | _entry_point_keys
+    return keys
+
+
+def is_valid_key(key):
+    return key in get_keys()
+
+
+def get_key_choices():
+    """
+    Return all the keys that are not mapped to functions, as a list of choices.
+    """
+    keys = sorted(get_keys() - set(settings.URLMAPPER_FUNCTIONS))
+    if not keys:
+        return [('', ugettext("There are no defined keys"))]
+    return zip(keys, keys)
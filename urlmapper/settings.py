@@ -1,5 +1,12 @@
 from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
 from django.core.exceptions import ImproperlyConfigured
+try:
+    from django.utils.module_loading import import_string
+except ImportError:  # Django < 1.7
+    from django.utils.module_loading import import_by_path as import_string
+
+from dispatch import compile_functions
 
 
 _DEFAULT_URLMAPPER_ALLOWED_MAPPINGS = ['url', 'object', 'view_name']
@@ -12,12 +19,35 @@ URLMAPPER_FUNCTIONS = getattr(settings, 'URLMAPPER_FUNCTIONS', {})
 
 URLMAPPER_CONTENTTYPES = getattr(settings, 'URLMAPPER_CONTENTTYPES', [])
 
+# The (app_label, model) pairs whose objects are watched for changes
+WATCHED_CONTENTTYPES = frozenset(
+    tuple(content_type) for content_type in URLMAPPER_CONTENTTYPES
+)
+
 URLMAPPER_ALLOWED_MAPPINGS = getattr(
     settings,
     'URLMAPPER_ALLOWED_MAPPINGS',
     _DEFAULT_URLMAPPER_ALLOWED_MAPPINGS
 )
 
+URLMAPPER_LOCAL_CACHE_SIZE = getattr(settings, 'URLMAPPER_LOCAL_CACHE_SIZE', 1000)
+
+URLMAPPER_CACHE = getattr(settings, 'URLMAPPER_CACHE', None)
+
+URLMAPPER_SNAPSHOT = getattr(settings, 'URLMAPPER_SNAPSHOT', None)
+
+URLMAPPER_WARM_ON_STARTUP = getattr(settings, 'URLMAPPER_WARM_ON_STARTUP', False)
+
+URLMAPPER_METRICS_BACKEND = getattr(settings, 'URLMAPPER_METRICS_BACKEND', None)
+
+URLMAPPER_LOOKUP_BUDGET = getattr(settings, 'URLMAPPER_LOOKUP_BUDGET', None)
+
+# Lookups are only timed and recorded if there is a backend to record them
+METRICS_BACKEND = (
+    import_string(URLMAPPER_METRICS_BACKEND)() if URLMAPPER_METRICS_BACKEND
+    else None
+)
+
 
 # Sanity check the settings
 
@@ -30,6 +60,21 @@ except AssertionError:
         )
     )
 
+try:
+    assert all(callable(function) for function in URLMAPPER_FUNCTIONS.values())
+except AssertionError:
+    raise ImproperlyConfigured(
+        "The following mapped functions are not callable: {keys}".format(
+            keys=[
+                key for key, function in URLMAPPER_FUNCTIONS.items()
+                if not callable(function)
+            ]
+        )
+    )
+
+# Work out how to call each mapping function once, rather than on every call
+FUNCTION_DISPATCH = compile_functions(URLMAPPER_FUNCTIONS)
+
 try:
     assert URLMAPPER_ALLOWED_MAPPINGS
     assert set(URLMAPPER_ALLOWED_MAPPINGS) <= set(_DEFAULT_URLMAPPER_ALLOWED_MAPPINGS)
@@ -39,3 +84,23 @@ except AssertionError:
             mappings=_DEFAULT_URLMAPPER_ALLOWED_MAPPINGS
         )
     )
+
+if URLMAPPER_CACHE:
+    try:
+        assert URLMAPPER_CACHE.get('ALIAS', DEFAULT_CACHE_ALIAS) in settings.CACHES
+    except AssertionError:
+        raise ImproperlyConfigured(
+            "URLMAPPER_CACHE refers to an unknown cache alias: {alias}".format(
+                alias=URLMAPPER_CACHE.get('ALIAS', DEFAULT_CACHE_ALIAS)
+            )
+        )
+
+try:
+    assert not URLMAPPER_LOOKUP_BUDGET or 'MAX_LOOKUPS' in URLMAPPER_LOOKUP_BUDGET
+except AssertionError:
+    raise ImproperlyConfigured("URLMAPPER_LOOKUP_BUDGET must include MAX_LOOKUPS")
+
+try:
+    assert not URLMAPPER_SNAPSHOT or URLMAPPER_SNAPSHOT.get('PATH')
+except AssertionError:
+    raise ImproperlyConfigured("URLMAPPER_SNAPSHOT must include a PATH")
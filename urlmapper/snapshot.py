@@ -0,0 +1,172 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+
+import settings
+
+
+FORMAT_VERSION = 1
+
+logger = logging.getLogger('urlmapper')
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _get_checksum(mappings):
+    return hashlib.sha256(
+        json.dumps(mappings, sort_keys=True, separators=(',', ':'))
+    ).hexdigest()
+
+
+def dumps(mappings):
+    """
+    Serialize a dictionary of keys to URLs as a snapshot.
+    """
+    return json.dumps(
+        {
+            'version': FORMAT_VERSION,
+            'created': int(time.time()),
+            'checksum': _get_checksum(mappings),
+            'mappings': mappings,
+        },
+        sort_keys=True,
+        separators=(',', ':')
+    )
+
+
+def loads(data):
+    """
+    Return the dictionary of keys to URLs in a serialized snapshot, raising a
+    SnapshotError if it is not a valid snapshot.
+    """
+    try:
+        snapshot = json.loads(data)
+        version = snapshot['version']
+        checksum = snapshot['checksum']
+        mappings = snapshot['mappings']
+    except (ValueError, TypeError, KeyError):
+        raise SnapshotError("Not a URL mapper snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(
+            "Unsupported snapshot version {version}".format(version=version)
+        )
+    if checksum != _get_checksum(mappings):
+        raise SnapshotError("Snapshot checksum does not match")
+    return mappings
+
+
+def snapshot_key(key, site_id=0, language=''):
+    """
+    Return the key that a mapping for a site and language is stored under in
+    a snapshot. Mappings for every site and language are stored under their
+    own key.
+    """
+    if not site_id and not language:
+        return key
+    return u"{key}|{site_id}|{language}".format(
+        key=key,
+        site_id=site_id,
+        language=language
+    )
+
+
+def _get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def write(path, mappings):
+    """
+    Write a snapshot to a file, replacing any existing file atomically so that
+    readers never see a partial snapshot.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.urlmapper')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(dumps(mappings))
+        # mkstemp creates files that only their owner can read, but snapshots
+        # are usually written by a deploy user and read by the web server.
+        os.chmod(temp_path, 0o644 & ~_get_umask())
+        os.rename(temp_path, path)
+    except:
+        os.unlink(temp_path)
+        raise
+
+
+class Snapshot(object):
+    """
+    A snapshot file, which is loaded again whenever its modification time
+    changes. Checks for changes are made at most every check_interval seconds.
+    """
+
+    def __init__(self, path, check_interval=1):
+        self.path = path
+        self.check_interval = check_interval
+        self._mappings = None
+        self._mtime = None
+        self._next_check = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return
+            with open(self.path) as f:
+                mappings = loads(f.read())
+        except (EnvironmentError, SnapshotError) as e:
+            if self._mappings is None:
+                raise ImproperlyConfigured(
+                    "Cannot load URL mapper snapshot {path}: {error}".format(
+                        path=self.path,
+                        error=e
+                    )
+                )
+            # Keep serving the snapshot that was last loaded
+            logger.error(
+                "Cannot reload URL mapper snapshot %s: %s", self.path, e
+            )
+            return
+        self._mappings = mappings
+        self._mtime = mtime
+
+    def get_mappings(self):
+        """
+        Return the dictionary of keys to URLs in the snapshot.
+        """
+        now = time.time()
+        if now >= self._next_check:
+            with self._lock:
+                if now >= self._next_check:
+                    self._load()
+                    self._next_check = now + self.check_interval
+        return self._mappings
+
+
+_snapshots = {}
+
+
+def get_snapshot():
+    """
+    Return the Snapshot configured by URLMAPPER_SNAPSHOT, or None.
+    """
+    if not settings.URLMAPPER_SNAPSHOT:
+        return None
+    path = settings.URLMAPPER_SNAPSHOT['PATH']
+    try:
+        return _snapshots[path]
+    except KeyError:
+        return _snapshots.setdefault(
+            path,
+            Snapshot(path, settings.URLMAPPER_SNAPSHOT.get('CHECK_INTERVAL', 1))
+        )
@@ -1,15 +1,155 @@
 from django import template
+from django.template.base import FilterExpression, Variable
+from django.template.defaultfilters import stringfilter
+from django.template.smartif import TokenBase
 
-from ..helpers import get_mapped_url, check_mapped_url
+from .. import budget, settings
+from ..content import rewrite_placeholders
+from ..helpers import (
+    get_mapped_url, get_mapped_urls, check_mapped_url, get_mapping_version
+)
+from ..memo import memoize
+from ..registry import is_valid_key
 
 register = template.Library()
 
 
-@register.simple_tag(takes_context=True)
-def mapped_url(context, key):
-    return get_mapped_url(key, context.get('request'))
+def _get_template_name(node, context):
+    """
+    Return the name of the template a node is being rendered in, if known.
+    Before Django 1.8 this is only available with TEMPLATE_DEBUG on.
+    """
+    template = getattr(context, 'template', None)
+    if template is not None:
+        return template.name
+    source = getattr(node, 'source', None)
+    if source is not None:
+        return source[0].name
+    return None
+
+
+class MappedURLNode(template.Node):
+
+    def __init__(self, key):
+        self.key = key
+
+    def render(self, context):
+        key = self.key.resolve(context)
+        if not budget.get_logs():
+            return get_mapped_url(key, context.get('request'))
+        with budget.rendering(_get_template_name(self, context)):
+            return get_mapped_url(key, context.get('request'))
+
+
+class PreloadMappedURLsNode(template.Node):
+
+    def __init__(self, nodelist, keys):
+        self.nodelist = nodelist
+        self.keys = keys
+
+    def render(self, context):
+        # Invalid keys are left for the tags themselves to report, and function
+        # mappings are still called when they are used.
+        keys = [
+            key for key in self.keys
+            if is_valid_key(key)
+            and key not in settings.URLMAPPER_FUNCTIONS
+        ]
+        with budget.rendering(_get_template_name(self, context)):
+            urls = get_mapped_urls(keys, context.get('request'))
+        with memoize(urls):
+            return self.nodelist.render(context)
+
+
+def _get_constant(filter_expression):
+    """
+    Return the string literal in a filter expression, or None if it is a
+    variable.
+    """
+    if isinstance(filter_expression.var, Variable):
+        return None
+    return filter_expression.var
+
+
+def _walk(obj, seen):
+    """
+    Yield every node, filter expression and if condition below obj.
+    """
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    if isinstance(obj, (list, tuple)):
+        children = obj
+    elif isinstance(obj, dict):
+        children = obj.values()
+    elif isinstance(obj, (template.Node, FilterExpression, TokenBase)):
+        yield obj
+        children = vars(obj).values()
+    else:
+        return
+    for child in children:
+        for descendant in _walk(child, seen):
+            yield descendant
+
+
+def _get_mapped_url_keys(nodelist):
+    """
+    Return the constant keys used by mapped_url tags and is_mapped_url filters
+    in a nodelist.
+    """
+    keys = set()
+    for obj in _walk(nodelist, set()):
+        if isinstance(obj, MappedURLNode) and not obj.key.filters:
+            keys.add(_get_constant(obj.key))
+        elif (
+            isinstance(obj, FilterExpression)
+            and obj.filters
+            and obj.filters[0][0] is is_mapped_url
+        ):
+            keys.add(_get_constant(obj))
+    keys.discard(None)
+    return keys
+
+
+@register.tag
+def mapped_url(parser, token):
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            "'{tag}' takes exactly one argument".format(tag=bits[0])
+        )
+    return MappedURLNode(parser.compile_filter(bits[1]))
+
+
+@register.tag
+def preload_mapped_urls(parser, token):
+    """
+    Look up every key given as a string to mapped_url or is_mapped_url within
+    the block in one go, before the block is rendered.
+    """
+    nodelist = parser.parse(('endpreload_mapped_urls',))
+    parser.delete_first_token()
+    return PreloadMappedURLsNode(nodelist, _get_mapped_url_keys(nodelist))
+
+
+@register.simple_tag
+def mapped_url_version():
+    """
+    Output a token that changes whenever the mappings change.
+    """
+    return get_mapping_version()
 
 
 @register.filter
 def is_mapped_url(key):
     return check_mapped_url(key)
+
+
+@register.filter(is_safe=True)
+@stringfilter
+def rewrite_mapped_urls(content):
+    """
+    Replace placeholders such as urlmap:terms-and-conditions with the URLs of
+    their keys.
+    """
+    return rewrite_placeholders(content)
@@ -0,0 +1,96 @@
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from ..admin import MappingTypeListFilter, URLMapAdmin
+from ..models import URLMap
+from .. import settings
+
+
+class TestURLMapAdmin(TestCase):
+
+    def setUp(self):
+        reload(settings)
+        self.admin = URLMapAdmin(URLMap, AdminSite())
+        self.request = RequestFactory().get('/')
+        for i in range(3):
+            user = User.objects.create(username='user{i}'.format(i=i))
+            URLMap.objects.create(key='test_{i}'.format(i=i + 3), content_object=user)
+
+    def tearDown(self):
+        reload(settings)
+
+    def _get_changelist(self):
+        list_display = self.admin.get_list_display(self.request)
+        return self.admin.get_changelist(self.request)(
+            self.request, URLMap, list_display,
+            self.admin.get_list_display_links(self.request, list_display),
+            self.admin.list_filter, self.admin.date_hierarchy,
+            self.admin.search_fields, self.admin.list_select_related,
+            self.admin.list_per_page, self.admin.list_max_show_all,
+            self.admin.list_editable, self.admin
+        )
+
+    def test_object_urls_prefetched(self):
+        URLMap.objects.filter(key='test_5').update(
+            content_type=None, object_id=None, view_name='test',
+            resolved_url='/test/'
+        )
+        with self.assertNumQueries(3):
+            # Count, mappings and users
+            urls = sorted(
+                url_map.get_resolved_url()
+                for url_map in self._get_changelist().result_list
+            )
+        self.assertEquals(urls, ['/test/', '/users/user0/', '/users/user1/'])
+
+    def test_watched_object_urls_not_prefetched(self):
+        with self.settings(URLMAPPER_CONTENTTYPES=[('auth', 'user')]):
+            reload(settings)
+        with self.assertNumQueries(2):
+            # Count and mappings
+            urls = sorted(
+                url_map.get_resolved_url()
+                for url_map in self._get_changelist().result_list
+            )
+        self.assertEquals(
+            urls, ['/users/user0/', '/users/user1/', '/users/user2/']
+        )
+
+    def test_mapping_type_filter(self):
+        URLMap.objects.filter(key='test_5').update(
+            content_type=None, object_id=None, url='/test/'
+        )
+
+        def keys(value):
+            request = RequestFactory().get('/', {'mapping_type': value})
+            list_filter = MappingTypeListFilter(
+                request, dict(request.GET.items()), URLMap, self.admin
+            )
+            return sorted(
+                list_filter.queryset(request, URLMap.objects.all()).values_list(
+                    'key', flat=True
+                )
+            )
+
+        self.assertEquals(keys('url'), ['test_5'])
+        self.assertEquals(keys('object'), ['test_3', 'test_4'])
+        self.assertEquals(keys('view'), [])
+
+    def test_search(self):
+        URLMap.objects.filter(key='test_5').update(
+            content_type=None, object_id=None, url='/test/'
+        )
+
+        def keys(search_term):
+            queryset, use_distinct = self.admin.get_search_results(
+                self.request, URLMap.objects.all(), search_term
+            )
+            return sorted(queryset.values_list('key', flat=True))
+
+        self.assertEquals(keys(''), ['test_3', 'test_4', 'test_5'])
+        self.assertEquals(keys('test_4'), ['test_4'])
+        self.assertEquals(keys('/te'), ['test_5'])
+        self.assertEquals(keys('test /test'), ['test_5'])
+        self.assertEquals(keys('est'), [])
@@ -0,0 +1,105 @@
+import logging
+from StringIO import StringIO
+
+from django.http import HttpResponse
+from django.template import Template, Context
+from django.template.base import Origin
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from ..budget import (
+    LookupBudgetExceeded, LookupBudgetTestMixin, track_lookups
+)
+from ..helpers import get_mapped_url, get_mapped_urls
+from ..middleware import MappedURLLookupBudgetMiddleware
+from ..models import URLMap
+from .. import cache, settings
+
+
+class TestLookupBudget(LookupBudgetTestMixin, TestCase):
+
+    def setUp(self):
+        reload(settings)
+        URLMap.objects.create(key='test_3', url='/test/')
+        URLMap.objects.create(key='test_4', view_name='test')
+        cache.clear()
+
+    def tearDown(self):
+        reload(settings)
+
+    def test_counts_uncached_lookups(self):
+        with track_lookups() as log:
+            get_mapped_url('test_1')
+            get_mapped_url('test_3')
+            get_mapped_url('test_3')
+            get_mapped_url('test_5')
+        self.assertEquals(log.lookups, [(('test_3',), None), (('test_5',), None)])
+
+    def test_batch_counts_once(self):
+        with track_lookups() as log:
+            get_mapped_urls(['test_3', 'test_4', 'test_5'])
+            get_mapped_urls(['test_3', 'test_4'])
+        self.assertEquals(log.lookups, [(('test_3', 'test_4', 'test_5'), None)])
+
+    def test_template_name(self):
+        with self.settings(TEMPLATE_DEBUG=True):
+            template = Template(
+                "{% load urlmapper_tags %}"
+                "{% for i in 'ab' %}{% mapped_url 'test_3' %}{% endfor %}",
+                Origin('page.html'),
+                'page.html'
+            )
+            with track_lookups() as log:
+                template.render(Context())
+        self.assertEquals(log.lookups, [(('test_3',), 'page.html')])
+
+    def test_raise(self):
+        with self.assertRaises(LookupBudgetExceeded) as cm:
+            with track_lookups(1, name='page', raise_exception=True):
+                get_mapped_url('test_3')
+                get_mapped_url('test_4')
+        self.assertIn("2 uncached mapped URL lookup(s) in page", str(cm.exception))
+        self.assertIn("test_4", str(cm.exception))
+
+    def test_warn(self):
+        stream = StringIO()
+        handler = logging.StreamHandler(stream)
+        logger = logging.getLogger('urlmapper')
+        logger.addHandler(handler)
+        try:
+            with track_lookups(0):
+                get_mapped_url('test_3')
+        finally:
+            logger.removeHandler(handler)
+        self.assertIn("1 uncached mapped URL lookup(s), budget 0", stream.getvalue())
+
+    def test_mixin(self):
+        with self.assertMappedURLLookups(2):
+            get_mapped_url('test_3')
+            get_mapped_url('test_4')
+        with self.assertRaises(AssertionError):
+            with self.assertMappedURLLookups(0):
+                get_mapped_url('test_5')
+
+    def test_middleware(self):
+        middleware = MappedURLLookupBudgetMiddleware()
+        request = RequestFactory().get('/page/')
+        with self.settings(URLMAPPER_LOOKUP_BUDGET={
+            'MAX_LOOKUPS': 1,
+            'RAISE': True,
+        }):
+            reload(settings)
+        middleware.process_request(request)
+        get_mapped_url('test_3')
+        get_mapped_url('test_4')
+        with self.assertRaises(LookupBudgetExceeded) as cm:
+            middleware.process_response(request, HttpResponse())
+        self.assertIn("in /page/", str(cm.exception))
+
+    def test_middleware_disabled(self):
+        middleware = MappedURLLookupBudgetMiddleware()
+        request = RequestFactory().get('/page/')
+        middleware.process_request(request)
+        get_mapped_url('test_3')
+        middleware.process_response(request, HttpResponse())
+        self.assertFalse(hasattr(request, '_urlmapper_lookups'))
@@ -0,0 +1,244 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.utils import translation
+
+from ..cache import LRUCache, MISSING
+from ..decorators import cache_mapping
+from ..helpers import get_mapped_url, get_mapped_urls, check_mapped_url
+from ..models import URLMap
+from .. import cache, settings
+
+
+class TestLRUCache(TestCase):
+
+    def test_missing(self):
+        lru = LRUCache(2)
+        self.assertIs(lru.get('a'), MISSING)
+        lru.set('a', '')
+        self.assertEquals(lru.get('a'), '')
+
+    def test_least_recently_used_is_evicted(self):
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEquals(len(lru), 2)
+        self.assertIn('a', lru)
+        self.assertNotIn('b', lru)
+        self.assertIn('c', lru)
+
+    def test_timeout(self):
+        lru = LRUCache(2)
+        lru.set('a', 1, timeout=0)
+        lru.set('b', 2, timeout=60)
+        self.assertIs(lru.get('a'), MISSING)
+        self.assertEquals(lru.get('b'), 2)
+
+    def test_zero_size_disables(self):
+        lru = LRUCache(0)
+        lru.set('a', 1)
+        self.assertIs(lru.get('a'), MISSING)
+
+
+class TestMappedURLCache(TestCase):
+
+    def setUp(self):
+        reload(settings)
+        cache.clear()
+
+    def test_mapped_url_is_cached(self):
+        URLMap.objects.create(key='test_3', url='/test/')
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+        with self.assertNumQueries(0):
+            self.assertEquals(get_mapped_url('test_3'), '/test/')
+            self.assertTrue(check_mapped_url('test_3'))
+
+    def test_unmapped_key_is_cached(self):
+        self.assertEquals(get_mapped_url('test_3'), '')
+        with self.assertNumQueries(0):
+            self.assertEquals(get_mapped_url('test_3'), '')
+            self.assertFalse(check_mapped_url('test_3'))
+
+    def test_save_invalidates(self):
+        url_map = URLMap.objects.create(key='test_3', url='/test/')
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+        url_map.url = '/test/other/'
+        url_map.save()
+        self.assertEquals(get_mapped_url('test_3'), '/test/other/')
+
+    def test_delete_invalidates(self):
+        url_map = URLMap.objects.create(key='test_3', url='/test/')
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+        url_map.delete()
+        self.assertEquals(get_mapped_url('test_3'), '')
+
+    def test_watched_object_mapping_is_cached(self):
+        with self.settings(URLMAPPER_CONTENTTYPES=[('auth', 'user')]):
+            reload(settings)
+        user = User.objects.create_user('test')
+        URLMap.objects.create(key='test_3', content_object=user)
+        URLMap.objects.create(key='test_4', url='/test/')
+        self.assertEquals(get_mapped_url('test_3'), '/users/test/')
+        self.assertEquals(get_mapped_url('test_4'), '/test/')
+        with self.assertNumQueries(0):
+            self.assertEquals(get_mapped_url('test_3'), '/users/test/')
+
+        user.username = 'renamed'
+        user.save()
+        self.assertEquals(get_mapped_url('test_3'), '/users/renamed/')
+        # Only the changed key was invalidated
+        with self.assertNumQueries(0):
+            self.assertEquals(get_mapped_url('test_4'), '/test/')
+
+    def test_object_mapping_is_not_cached(self):
+        user = User.objects.create_user('test')
+        URLMap.objects.create(key='test_3', content_object=user)
+        self.assertEquals(get_mapped_url('test_3'), user.get_absolute_url())
+        user.username = 'renamed'
+        user.save()
+        self.assertEquals(get_mapped_url('test_3'), user.get_absolute_url())
+
+
+class TestSharedCache(TestCase):
+
+    def setUp(self):
+        with self.settings(URLMAPPER_CACHE={'ALIAS': 'default'}):
+            reload(settings)
+        self.shared_cache = cache.get_shared_cache()
+        self.shared_cache.clear()
+        cache.clear()
+
+    def tearDown(self):
+        reload(settings)
+
+    def test_shared_cache_is_used_by_other_processes(self):
+        URLMap.objects.create(key='test_3', url='/test/')
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+        # Simulate a fresh process, with nothing in its local cache
+        cache.local_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEquals(get_mapped_url('test_3'), '/test/')
+            self.assertTrue(check_mapped_url('test_3'))
+
+    def test_batch_lookups_use_shared_cache(self):
+        URLMap.objects.create(key='test_3', url='/test/')
+        get_mapped_urls(['test_3', 'test_4'])
+        cache.local_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEquals(
+                get_mapped_urls(['test_3', 'test_4']),
+                {'test_3': '/test/', 'test_4': ''}
+            )
+
+    def test_generation_change_invalidates_local_cache(self):
+        URLMap.objects.create(key='test_3', url='/test/')
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+        # Simulate a write on another node, without any signal locally
+        URLMap.objects.filter(key='test_3').update(
+            url='/test/other/',
+            resolved_url='/test/other/'
+        )
+        self.shared_cache.incr('urlmapper:generation')
+        self.assertEquals(get_mapped_url('test_3'), '/test/other/')
+
+    def test_evicted_generation_is_reseeded(self):
+        URLMap.objects.create(key='test_3', url='/test/')
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+        self.shared_cache.delete('urlmapper:generation')
+        cache.clear()
+        self.assertIsNotNone(self.shared_cache.get('urlmapper:generation'))
+
+
+class TestFunctionCachePolicy(TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        def count_calls(request=None):
+            self.calls.append(request)
+            return '/test/{n}/'.format(n=len(self.calls))
+
+        self.count_calls = count_calls
+        cache.clear()
+
+    def tearDown(self):
+        reload(settings)
+
+    def set_function(self, function):
+        with self.settings(URLMAPPER_FUNCTIONS={'test_1': function}):
+            reload(settings)
+
+    def test_uncached_by_default(self):
+        self.set_function(self.count_calls)
+        self.assertEquals(get_mapped_url('test_1'), '/test/1/')
+        self.assertEquals(get_mapped_url('test_1'), '/test/2/')
+
+    def test_cached_forever(self):
+        self.set_function(cache_mapping()(self.count_calls))
+        self.assertEquals(get_mapped_url('test_1'), '/test/1/')
+        self.assertEquals(get_mapped_url('test_1'), '/test/1/')
+
+    def test_timeout(self):
+        self.set_function(cache_mapping(timeout=0)(self.count_calls))
+        self.assertEquals(get_mapped_url('test_1'), '/test/1/')
+        self.assertEquals(get_mapped_url('test_1'), '/test/2/')
+
+    def test_vary_on_language(self):
+        self.set_function(cache_mapping(vary_on=['language'])(self.count_calls))
+        with translation.override('en'):
+            self.assertEquals(get_mapped_url('test_1'), '/test/1/')
+        with translation.override('fr'):
+            self.assertEquals(get_mapped_url('test_1'), '/test/2/')
+        with translation.override('en'):
+            self.assertEquals(get_mapped_url('test_1'), '/test/1/')
+
+    def test_vary_on_user(self):
+        self.set_function(cache_mapping(vary_on=['user'])(self.count_calls))
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        self.assertEquals(get_mapped_url('test_1', request), '/test/1/')
+        self.assertEquals(get_mapped_url('test_1', request), '/test/1/')
+        request.user = User.objects.create_user('test')
+        self.assertEquals(get_mapped_url('test_1', request), '/test/2/')
+
+    def test_no_request_cached_separately(self):
+        def account(request):
+            self.calls.append(request)
+            return '/none/' if request is None else '/account/'
+
+        self.set_function(cache_mapping(vary_on=['user'])(account))
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        self.assertTrue(check_mapped_url('test_1'))
+        self.assertEquals(get_mapped_url('test_1', request), '/account/')
+        self.assertEquals(get_mapped_url('test_1'), '/none/')
+        self.assertEquals(get_mapped_url('test_1', request), '/account/')
+        self.assertEquals(self.calls, [None, request])
+
+    def test_vary_on_function(self):
+        self.set_function(
+            cache_mapping(vary_on=[lambda request: request.path])(self.count_calls)
+        )
+        factory = RequestFactory()
+        self.assertEquals(get_mapped_url('test_1', factory.get('/a/')), '/test/1/')
+        self.assertEquals(get_mapped_url('test_1', factory.get('/a/')), '/test/1/')
+        self.assertEquals(get_mapped_url('test_1', factory.get('/b/')), '/test/2/')
+
+    def test_unknown_vary_on(self):
+        with self.assertRaises(ValueError):
+            cache_mapping(vary_on=['invalid'])
+
+    def test_exceptions_are_not_cached(self):
+        @cache_mapping()
+        def flaky():
+            self.calls.append(None)
+            if len(self.calls) == 1:
+                raise ValueError
+            return '/test/'
+
+        self.set_function(flaky)
+        with self.assertRaises(ValueError):
+            get_mapped_url('test_1')
+        self.assertEquals(get_mapped_url('test_1'), '/test/')
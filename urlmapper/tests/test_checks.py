@@ -0,0 +1,104 @@
+from StringIO import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..checks import check_mappings
+from ..models import URLMap
+from .. import settings
+
+
+class TestCheckMappings(TestCase):
+
+    def setUp(self):
+        reload(settings)
+        self.user = User.objects.create(username='test')
+        URLMap.objects.create(key='test_3', url='/test/')
+        URLMap.objects.create(key='test_4', view_name='test', view_keywords='slug=a')
+        URLMap.objects.create(key='test_5', content_object=self.user)
+
+    def _problems(self, **kwargs):
+        return dict(
+            (key, problems) for key, site_id, language, problems, seconds
+            in check_mappings(**kwargs) if problems
+        )
+
+    def test_valid(self):
+        with self.assertNumQueries(2):
+            # Mappings and users
+            self.assertEquals(self._problems(), {})
+
+    def test_problems(self):
+        URLMap.objects.filter(key='test_3').update(resolved_url='/old/')
+        URLMap.objects.filter(key='test_4').update(view_name='missing')
+        self.user.delete()
+        problems = self._problems(workers=2)
+        self.assertEquals(sorted(problems), ['test_3', 'test_4', 'test_5'])
+        self.assertIn("/old/ is out of date", problems['test_3'][0])
+        self.assertIn("No match for view missing", problems['test_4'][0])
+        self.assertEquals(problems['test_5'], ["Object does not exist"])
+
+    def test_variants_checked_separately(self):
+        other_user = User.objects.create(username='other')
+        URLMap.objects.create(
+            key='test_5', language='fr', content_object=other_user
+        )
+        other_user.delete()
+        problems = dict(
+            ((key, site_id, language), problems)
+            for key, site_id, language, problems, seconds
+            in check_mappings(workers=1)
+        )
+        self.assertEquals(problems[('test_5', 0, '')], [])
+        self.assertEquals(
+            problems[('test_5', 0, 'fr')], ["Object does not exist"]
+        )
+
+        stderr = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('urlmapper_check', stdout=StringIO(), stderr=stderr)
+        self.assertEquals(
+            stderr.getvalue().strip(),
+            "test_5 (all sites, language fr): Object does not exist"
+        )
+
+    def test_status(self):
+        # The test views have no templates, so fetching them fails
+        problems = self._problems(workers=1, check_status=True)
+        self.assertIn("Fetching /test/ raised", problems['test_3'][0])
+
+    def test_status_from_site_domain(self):
+        URLMap.objects.filter(key='test_3').update(
+            url='/ok/', resolved_url='/ok/'
+        )
+        URLMap.objects.filter(key='test_4').delete()
+        URLMap.objects.filter(key='test_5').delete()
+        with self.settings(ALLOWED_HOSTS=['example.com', 'www.example.org']):
+            self.assertEquals(self._problems(check_status=True), {})
+            self.assertEquals(
+                self._problems(check_status=True, host='www.example.org'), {}
+            )
+            problems = self._problems(check_status=True, host='other.com')
+            self.assertEquals(problems['test_3'], ["/ok/ returned 400"])
+
+            call_command(
+                'urlmapper_check', status=True, host='www.example.org',
+                stdout=StringIO()
+            )
+
+    def test_command(self):
+        stdout = StringIO()
+        call_command('urlmapper_check', stdout=stdout)
+        self.assertIn("Checked 3 mapping(s)", stdout.getvalue())
+        self.assertIn("0 with problems", stdout.getvalue())
+
+        URLMap.objects.filter(key='test_4').update(view_name='missing')
+        stderr = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('urlmapper_check', stdout=stdout, stderr=stderr)
+        self.assertIn(
+            "test_4 (all sites, all languages): No match for view missing",
+            stderr.getvalue()
+        )
@@ -0,0 +1,130 @@
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import translation
+
+from ..decorators import cache_mapping
+from ..helpers import get_mapped_url, warm_cache
+from ..models import URLMap
+from .. import cache, settings
+
+
+def _broken():
+    raise ValueError("broken")
+
+
+@override_settings(
+    LANGUAGE_CODE='de',
+    LANGUAGES=(('de', 'German'), ('fr', 'French'))
+)
+class TestWarmCache(TestCase):
+
+    def setUp(self):
+        self.functions = {
+            'test_1': cache_mapping()(lambda: '/static/'),
+            'test_2': cache_mapping()(_broken),
+        }
+        with self.settings(URLMAPPER_FUNCTIONS=self.functions):
+            reload(settings)
+        URLMap.objects.create(key='test_3', url='/test/')
+        URLMap.objects.create(key='test_4', view_name='test')
+        cache.clear()
+
+    def tearDown(self):
+        reload(settings)
+
+    def test_warm_cache(self):
+        with self.assertNumQueries(1):
+            results = warm_cache(languages=['de'])
+        self.assertEquals(
+            sorted(
+                (key, language, url)
+                for key, language, url, seconds, error in results
+            ),
+            [
+                ('test_1', None, '/static/'),
+                ('test_2', None, ''),
+                ('test_3', 'de', '/test/'),
+                ('test_4', 'de', '/test/'),
+                ('test_5', 'de', ''),
+            ]
+        )
+        errors = dict(
+            (key, error) for key, language, url, seconds, error in results
+        )
+        self.assertIsInstance(errors.pop('test_2'), ValueError)
+        self.assertEquals(set(errors.values()), set([None]))
+
+        with self.assertNumQueries(0), translation.override('de'):
+            self.assertEquals(get_mapped_url('test_1'), '/static/')
+            self.assertEquals(get_mapped_url('test_3'), '/test/')
+            self.assertEquals(get_mapped_url('test_5'), '')
+
+    def test_warm_cache_for_mapped_languages(self):
+        URLMap.objects.create(key='test_3', language='fr', url='/test/fr/')
+        with self.assertNumQueries(3):
+            # Languages, then mappings in fr and de
+            results = warm_cache()
+        self.assertEquals(
+            [language for key, language, url, seconds, error in results
+             if key == 'test_3'],
+            ['fr', 'de']
+        )
+        with self.assertNumQueries(0):
+            with translation.override('de'):
+                self.assertEquals(get_mapped_url('test_3'), '/test/')
+            with translation.override('fr'):
+                self.assertEquals(get_mapped_url('test_3'), '/test/fr/')
+
+    def test_default_language_kept_when_cache_fills(self):
+        URLMap.objects.create(key='test_3', language='fr', url='/test/fr/')
+        local_cache = cache.local_cache
+        # Room for one language's keys only
+        cache.local_cache = cache.LRUCache(3)
+        try:
+            warm_cache()
+            with self.assertNumQueries(0), translation.override('de'):
+                for key in ('test_3', 'test_4', 'test_5'):
+                    get_mapped_url(key)
+        finally:
+            cache.local_cache = local_cache
+
+    def test_command(self):
+        with self.settings(
+            URLMAPPER_FUNCTIONS=self.functions,
+            URLMAPPER_CACHE={'ALIAS': 'default'}
+        ):
+            reload(settings)
+        cache.get_shared_cache().clear()
+        stdout = StringIO()
+        stderr = StringIO()
+        URLMap.objects.create(key='test_3', language='fr', url='/test/fr/')
+        call_command('urlmapper_warm', stdout=stdout, stderr=stderr)
+        self.assertIn("test_3 (de) -> /test/", stdout.getvalue())
+        self.assertIn("test_3 (fr) -> /test/fr/", stdout.getvalue())
+        self.assertIn("Unmapped: test_5 (fr), test_5 (de)", stdout.getvalue())
+        self.assertIn("Warmed 8 URL(s)", stdout.getvalue())
+        self.assertIn("Failed to resolve test_2", stderr.getvalue())
+        # Management commands activate en-us, which no request uses
+        cache.local_cache.clear()
+        with self.assertNumQueries(0), translation.override('de'):
+            self.assertEquals(get_mapped_url('test_3'), '/test/')
+
+    def test_command_with_keys(self):
+        with self.settings(
+            URLMAPPER_FUNCTIONS=self.functions,
+            URLMAPPER_CACHE={'ALIAS': 'default'}
+        ):
+            reload(settings)
+        stdout = StringIO()
+        call_command(
+            'urlmapper_warm', 'test_3', languages=['fr'], stdout=stdout
+        )
+        self.assertIn("Warmed 1 URL(s)", stdout.getvalue())
+
+    def test_command_without_shared_cache(self):
+        with self.assertRaises(CommandError):
+            call_command('urlmapper_warm', stdout=StringIO())
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import Template, Context
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.utils.safestring import SafeData, mark_safe
+
+from ..content import rewrite_placeholder_chunks, rewrite_placeholders
+from ..middleware import MappedURLPlaceholderMiddleware
+from ..models import URLMap
+from .. import cache, settings
+
+
+class TestRewritePlaceholders(TestCase):
+
+    def setUp(self):
+        reload(settings)
+        cache.clear()
+        URLMap.objects.create(key='test_3', url='/terms/')
+        URLMap.objects.create(key='test_4', url=u'/caf\xe9/')
+
+    def test_keys_looked_up_in_one_query(self):
+        content = (
+            '<a href="urlmap:test_3">Terms</a> <a href="urlmap:test_4">Cafe</a>'
+            ' <a href="urlmap:test_3">Terms again</a>'
+        )
+        with self.assertNumQueries(1):
+            self.assertEquals(
+                rewrite_placeholders(content),
+                u'<a href="/terms/">Terms</a> <a href="/caf\xe9/">Cafe</a>'
+                u' <a href="/terms/">Terms again</a>'
+            )
+
+    def test_functions_and_unmapped_keys(self):
+        self.assertEquals(
+            rewrite_placeholders('urlmap:test_1 urlmap:test_5.'),
+            'test_1_success .'
+        )
+
+    def test_invalid_keys_left_alone(self):
+        with self.assertNumQueries(0):
+            self.assertEquals(
+                rewrite_placeholders('<a href="urlmap:invalid">'),
+                '<a href="urlmap:invalid">'
+            )
+
+    def test_bytes_encoded(self):
+        self.assertEquals(
+            rewrite_placeholders(b'urlmap:test_4', encoding='utf-8'),
+            b'/caf\xc3\xa9/'
+        )
+
+    def test_chunks(self):
+        content = 'See urlmap:test_3, urlmap:test_4 and urlmap:invalid. '
+        expected = rewrite_placeholders(content)
+        for size in range(1, len(content) + 1):
+            chunks = [
+                content[i:i + size] for i in range(0, len(content), size)
+            ]
+            self.assertEquals(
+                u''.join(rewrite_placeholder_chunks(chunks)), expected
+            )
+
+    def test_chunks_not_held_back(self):
+        chunks = rewrite_placeholder_chunks(
+            iter(['<a href="urlmap:test_3">Terms</a>', '<a href="urlm'])
+        )
+        self.assertEquals(next(chunks), u'<a href="/terms/">Terms</a>')
+        self.assertEquals(next(chunks), u'<a href="')
+        self.assertEquals(list(chunks), [u'urlm'])
+
+    def test_filter(self):
+        template = Template(
+            "{% load urlmapper_tags %}{{ body|rewrite_mapped_urls }}"
+        )
+        rendered = template.render(Context({
+            'body': mark_safe('<a href="urlmap:test_3">Terms</a>')
+        }))
+        self.assertEquals(rendered, '<a href="/terms/">Terms</a>')
+        self.assertIsInstance(rendered, SafeData)
+
+
+class TestMappedURLPlaceholderMiddleware(TestCase):
+
+    def setUp(self):
+        reload(settings)
+        cache.clear()
+        URLMap.objects.create(key='test_3', url=u'/caf\xe9/')
+        self.middleware = MappedURLPlaceholderMiddleware()
+        self.request = RequestFactory().get('/')
+
+    def test_response(self):
+        response = HttpResponse('<a href="urlmap:test_3">Cafe</a>')
+        response['Content-Length'] = len(response.content)
+        response = self.middleware.process_response(self.request, response)
+        self.assertEquals(response.content, b'<a href="/caf\xc3\xa9/">Cafe</a>')
+        self.assertEquals(response['Content-Length'], str(len(response.content)))
+
+    def test_streaming_response(self):
+        response = StreamingHttpResponse(['<a href="url', 'map:test_3">Cafe</a>'])
+        response = self.middleware.process_response(self.request, response)
+        self.assertEquals(
+            b''.join(response.streaming_content),
+            b'<a href="/caf\xc3\xa9/">Cafe</a>'
+        )
+
+    def test_other_responses_left_alone(self):
+        response = HttpResponse('urlmap:test_3', content_type='text/plain')
+        response = self.middleware.process_response(self.request, response)
+        self.assertEquals(response.content, b'urlmap:test_3')
+
+        response = HttpResponse('urlmap:test_3')
+        response['Content-Encoding'] = 'gzip'
+        response = self.middleware.process_response(self.request, response)
+        self.assertEquals(response.content, b'urlmap:test_3')
@@ -0,0 +1,78 @@
+import functools
+import sys
+
+from django.contrib.sites.models import Site
+from django.test import TestCase
+from django.utils import translation
+
+from .. import decorators, dispatch
+from ..dispatch import compile_function
+
+
+class TestCompileFunction(TestCase):
+
+    def test_no_arguments(self):
+        self.assertEquals(compile_function(lambda: 'a')(object()), 'a')
+
+    def test_request(self):
+        request = object()
+        self.assertIs(compile_function(lambda r: r)(request), request)
+        self.assertIs(compile_function(lambda *args: args[0])(request), request)
+
+    def test_injected_arguments(self):
+        def mapping(language, request, site):
+            return language, request, site
+
+        request = object()
+        with translation.override('fr'):
+            self.assertEquals(
+                compile_function(mapping)(request),
+                ('fr', request, Site.objects.get_current())
+            )
+
+    def test_type_error_is_not_retried(self):
+        calls = []
+
+        def mapping(request):
+            calls.append(request)
+            raise TypeError
+
+        with self.assertRaises(TypeError):
+            compile_function(mapping)(None)
+        self.assertEquals(calls, [None])
+
+    def test_partial(self):
+        def mapping(prefix, request):
+            return prefix + request
+
+        self.assertEquals(
+            compile_function(functools.partial(mapping, '/a'))('/b/'),
+            '/a/b/'
+        )
+
+    def test_callable_object(self):
+        class Mapping(object):
+            def __call__(self, request):
+                return request
+
+        self.assertEquals(compile_function(Mapping())('/a/'), '/a/')
+
+    def test_builtin(self):
+        self.assertEquals(compile_function(str)('/a/'), '/a/')
+
+    def test_sites_framework_imported_lazily(self):
+        modules = dict(
+            (name, sys.modules.pop(name)) for name in list(sys.modules)
+            if name.startswith('django.contrib.sites')
+        )
+        try:
+            reload(dispatch)
+            reload(decorators)
+            self.assertFalse([
+                name for name in sys.modules
+                if name.startswith('django.contrib.sites')
+            ])
+        finally:
+            sys.modules.update(modules)
+            reload(dispatch)
+            reload(decorators)
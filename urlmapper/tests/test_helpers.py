@@ -1,8 +1,13 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import translation
 
-from ..helpers import get_mapped_url, check_mapped_url
+from ..decorators import cache_mapping
+from ..helpers import (
+    get_mapped_url, get_mapped_urls, check_mapped_url, get_keys_for_url
+)
 from ..models import URLMap
-from .. import settings
+from .. import cache, settings
 
 
 class TestGetMappedURL(TestCase):
@@ -11,6 +16,7 @@ class TestGetMappedURL(TestCase):
         # App settings are evaluated at module load, so we need to be able to
         # relaod them if we override anything.
         reload(settings)
+        cache.clear()
 
     def test_key_does_not_exist_error(self):
         with self.assertRaises(KeyError):
@@ -51,9 +57,65 @@ class TestGetMappedURL(TestCase):
         self.assertEquals(get_mapped_url('test_3'), 'test_3_success')
 
 
+class TestGetMappedURLs(TestCase):
+
+    def setUp(self):
+        reload(settings)
+        cache.clear()
+        self.users = [
+            User.objects.create_user('test_a'),
+            User.objects.create_user('test_b')
+        ]
+        URLMap.objects.create(key='test_3', url='test_3_success')
+        URLMap.objects.create(key='test_4', content_object=self.users[0])
+        URLMap.objects.create(key='test_5', content_object=self.users[1])
+
+    def test_returns_all_mappings(self):
+        self.assertEquals(
+            get_mapped_urls(['test_1', 'test_2', 'test_3', 'test_4', 'test_5']),
+            {
+                'test_1': 'test_1_success',
+                'test_2': 'test_2_success',
+                'test_3': 'test_3_success',
+                'test_4': self.users[0].get_absolute_url(),
+                'test_5': self.users[1].get_absolute_url(),
+            }
+        )
+
+    def test_constant_number_of_queries(self):
+        # One query for the mappings, and one for the users
+        with self.assertNumQueries(2):
+            get_mapped_urls(['test_3', 'test_4', 'test_5'])
+
+    def test_unmapped_key(self):
+        URLMap.objects.filter(key='test_3').delete()
+        self.assertEquals(get_mapped_urls(['test_3']), {'test_3': ''})
+
+    def test_key_does_not_exist_error(self):
+        with self.assertRaises(KeyError):
+            get_mapped_urls(['test_3', 'invalid'])
+
+    def test_key_does_not_exist_without_error(self):
+        with self.settings(URLMAPPER_RAISE_EXCEPTION=False):
+            reload(settings)
+            self.assertEquals(
+                get_mapped_urls(['test_3', 'invalid']),
+                {'test_3': 'test_3_success', 'invalid': ''}
+            )
+
+    def test_results_are_cached(self):
+        get_mapped_urls(['test_3', 'test_4'])
+        with self.assertNumQueries(0):
+            self.assertEquals(get_mapped_url('test_3'), 'test_3_success')
+        # Object mappings are always resolved afresh
+        with self.assertNumQueries(2):
+            get_mapped_urls(['test_3', 'test_4'])
+
+
 class TestCheckMappedURL(TestCase):
 
     def setUp(self):
+        cache.clear()
         URLMap.objects.create(key='test_3', url='test_3_success')
         URLMap.objects.create(key='test_4')
 
@@ -66,3 +128,69 @@ class TestCheckMappedURL(TestCase):
         self.assertFalse(check_mapped_url('test_4'))
         self.assertFalse(check_mapped_url('test_5'))
         self.assertFalse(check_mapped_url('test_6'))
+
+
+class TestGetKeysForURL(TestCase):
+
+    def setUp(self):
+        with self.settings(URLMAPPER_FUNCTIONS={
+            'test_1': cache_mapping()(lambda: '/test/'),
+            'test_2': lambda request: '/test/',
+        }):
+            reload(settings)
+        cache.clear()
+        URLMap.objects.create(key='test_3', url='/test/')
+        URLMap.objects.create(key='test_4', view_name='test')
+        URLMap.objects.create(key='test_5', url='/test/')
+        URLMap.objects.create(key='test_5', language='fr', url='/test/fr/')
+
+    def tearDown(self):
+        reload(settings)
+
+    def test_keys_for_url(self):
+        self.assertEquals(
+            get_keys_for_url('/test/'), ['test_1', 'test_3', 'test_4', 'test_5']
+        )
+        self.assertEquals(get_keys_for_url('/other/'), [])
+
+    def test_language(self):
+        with translation.override('fr'):
+            self.assertEquals(
+                get_keys_for_url('/test/'), ['test_1', 'test_3', 'test_4']
+            )
+            self.assertEquals(get_keys_for_url('/test/fr/'), ['test_5'])
+
+    def test_indexed(self):
+        with self.assertNumQueries(1):
+            get_keys_for_url('/test/')
+        with self.assertNumQueries(0):
+            get_keys_for_url('/test/')
+            get_keys_for_url('/other/')
+        with translation.override('fr'), self.assertNumQueries(1):
+            get_keys_for_url('/test/')
+
+    def test_index_updated(self):
+        get_keys_for_url('/test/')
+        URLMap.objects.filter(key='test_3').get().delete()
+        URLMap.objects.create(key='test_3', url='/test/3/')
+        self.assertEquals(get_keys_for_url('/test/3/'), ['test_3'])
+        self.assertEquals(
+            get_keys_for_url('/test/'), ['test_1', 'test_4', 'test_5']
+        )
+
+    def test_object_mappings(self):
+        user = User.objects.create(username='test')
+        URLMap.objects.create(key='test_3', language='de', content_object=user)
+        with translation.override('de'):
+            self.assertEquals(
+                get_keys_for_url(user.get_absolute_url()), ['test_3']
+            )
+            # Objects that are not watched are found by their current URL
+            user.username = 'renamed'
+            user.save()
+            self.assertEquals(get_keys_for_url('/users/test/'), [])
+            with self.assertNumQueries(2):
+                # The mappings, then the users
+                self.assertEquals(
+                    get_keys_for_url('/users/renamed/'), ['test_3']
+                )
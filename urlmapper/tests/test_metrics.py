@@ -0,0 +1,82 @@
+from django.test import TestCase
+
+from ..helpers import get_mapped_url, get_mapped_urls
+from ..metrics import InMemoryBackend
+from ..models import URLMap
+from .. import cache, settings
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        with self.settings(
+            URLMAPPER_METRICS_BACKEND='urlmapper.metrics.InMemoryBackend'
+        ):
+            reload(settings)
+        self.backend = settings.METRICS_BACKEND
+        URLMap.objects.create(key='test_3', url='/test/')
+        URLMap.objects.create(key='test_4', view_name='test')
+        cache.clear()
+
+    def tearDown(self):
+        reload(settings)
+
+    def test_disabled_by_default(self):
+        reload(settings)
+        self.assertIsNone(settings.METRICS_BACKEND)
+
+    def test_backend(self):
+        self.assertIsInstance(self.backend, InMemoryBackend)
+
+    def test_hits_and_misses(self):
+        get_mapped_url('test_3')
+        get_mapped_url('test_3')
+        get_mapped_url('test_5')
+        get_mapped_url('test_1')
+        stats = self.backend.keys['test_3']
+        self.assertEquals(stats['lookups'], 2)
+        self.assertEquals(stats['hits'], 1)
+        self.assertEquals(stats['misses'], 1)
+        self.assertEquals(self.backend.sources['url']['lookups'], 1)
+        self.assertEquals(self.backend.sources['cache']['lookups'], 1)
+        self.assertEquals(self.backend.sources['unmapped']['lookups'], 1)
+        self.assertEquals(self.backend.sources['function']['lookups'], 1)
+
+    def test_queries(self):
+        with self.settings(DEBUG=True):
+            get_mapped_url('test_3')
+            get_mapped_url('test_3')
+        self.assertEquals(self.backend.keys['test_3']['queries'], 1)
+
+    def test_batch(self):
+        get_mapped_url('test_3')
+        get_mapped_urls(['test_1', 'test_3', 'test_4', 'test_5'])
+        self.assertEquals(
+            dict(
+                (source, stats['lookups'])
+                for source, stats in self.backend.sources.items()
+            ),
+            {'url': 1, 'cache': 1, 'function': 1, 'view': 1, 'unmapped': 1}
+        )
+
+    def test_swallowed_exception(self):
+        with self.settings(
+            URLMAPPER_FUNCTIONS={'test_1': lambda: [][0]},
+            URLMAPPER_RAISE_EXCEPTION=False
+        ):
+            reload(settings)
+        settings.METRICS_BACKEND = self.backend
+        self.assertEquals(get_mapped_url('test_1'), '')
+        key, exception = self.backend.exceptions[0]
+        self.assertEquals(key, 'test_1')
+        self.assertIn('IndexError', exception)
+
+    def test_report(self):
+        for i in range(3):
+            get_mapped_url('test_4')
+        get_mapped_url('test_3')
+        report = self.backend.get_report(limit=1)
+        self.assertEquals(len(report['hottest']), 1)
+        self.assertEquals(report['hottest'][0]['key'], 'test_4')
+        self.assertEquals(report['hottest'][0]['lookups'], 3)
+        self.assertEquals(len(report['slowest']), 1)
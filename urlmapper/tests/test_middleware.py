@@ -0,0 +1,82 @@
+from django.http import HttpResponse
+from django.template import Template, RequestContext
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from ..helpers import get_mapped_url, check_mapped_url
+from ..memo import get_memo
+from ..middleware import MappedURLMemoMiddleware
+from ..models import URLMap
+from .. import cache, settings
+
+
+class TestMappedURLMemoMiddleware(TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        def account(request):
+            self.calls.append(request)
+            return '/account/{id}/'.format(id=id(request))
+
+        with self.settings(URLMAPPER_FUNCTIONS={'test_1': account}):
+            reload(settings)
+        cache.clear()
+        self.middleware = MappedURLMemoMiddleware()
+        self.request = RequestFactory().get('/')
+
+    def tearDown(self):
+        reload(settings)
+
+    def test_function_called_once_per_request(self):
+        self.middleware.process_request(self.request)
+        template = Template("""
+        {% load urlmapper_tags %}
+        {% if 'test_1'|is_mapped_url %}{% mapped_url 'test_1' %}{% endif %}
+        {% mapped_url 'test_1' %}
+        """)
+        template.render(RequestContext(self.request, {'request': self.request}))
+        self.middleware.process_response(self.request, HttpResponse())
+        self.assertEquals(self.calls, [self.request])
+
+    def test_database_mapping_looked_up_once_per_request(self):
+        URLMap.objects.create(key='test_3', url='/test/')
+        self.middleware.process_request(self.request)
+        with self.assertNumQueries(1):
+            self.assertTrue(check_mapped_url('test_3'))
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEquals(get_mapped_url('test_3'), '/test/')
+        self.middleware.process_response(self.request, HttpResponse())
+
+    def test_memo_does_not_leak_between_requests(self):
+        self.middleware.process_request(self.request)
+        get_mapped_url('test_1')
+        self.middleware.process_response(self.request, HttpResponse())
+        self.assertIsNone(get_memo())
+
+        other_request = RequestFactory().get('/')
+        self.middleware.process_request(other_request)
+        self.assertEquals(
+            get_mapped_url('test_1'),
+            '/account/{id}/'.format(id=id(other_request))
+        )
+        self.middleware.process_response(other_request, HttpResponse())
+        self.assertEquals(self.calls, [self.request, other_request])
+
+    def test_other_requests_are_not_memoized(self):
+        self.middleware.process_request(self.request)
+        other_request = RequestFactory().get('/')
+        get_mapped_url('test_1', other_request)
+        get_mapped_url('test_1', other_request)
+        self.middleware.process_response(self.request, HttpResponse())
+        self.assertEquals(self.calls, [other_request, other_request])
+
+    def test_save_clears_memo(self):
+        self.middleware.process_request(self.request)
+        url_map = URLMap.objects.create(key='test_3', url='/test/')
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+        url_map.url = '/test/other/'
+        url_map.save()
+        self.assertEquals(get_mapped_url('test_3'), '/test/other/')
+        self.middleware.process_response(self.request, HttpResponse())
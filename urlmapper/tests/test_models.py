@@ -1,10 +1,17 @@
+from StringIO import StringIO
+
 from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
 from django.core.exceptions import ValidationError
 from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.urlresolvers import set_script_prefix
 from django.test import TestCase
 
-from ..models import URLMap
+from ..helpers import get_mapped_url
+from ..models import URLMap, parse_view_keywords, refresh_resolved_urls
+from ..registry import get_key_choices
+from .. import cache, settings
 
 
 class TestModels(TestCase):
@@ -21,7 +28,7 @@ class TestModels(TestCase):
 
     def test_get_key_choices(self):
         self.assertEquals(
-            set(self.url_map._meta.get_field_by_name('key')[0].choices),
+            set(get_key_choices()),
             set(
                 (
                     ('test_3', 'test_3'),
@@ -134,3 +141,114 @@ class TestModels(TestCase):
             unicode(self.url_map.mapping_type()),
             u"Direct"
         )
+
+
+class TestViewMappings(TestCase):
+
+    def test_parse_view_keywords(self):
+        self.assertEquals(parse_view_keywords(''), {})
+        self.assertEquals(
+            parse_view_keywords('slug=terms, language = en,'),
+            {'slug': 'terms', 'language': 'en'}
+        )
+        with self.assertRaises(ValueError):
+            parse_view_keywords('slug')
+
+    def test_reverse_is_memoized(self):
+        cache.reverse_cache.clear()
+        url_map = URLMap(key='test_3', view_name='test', view_keywords='pk=1')
+        self.assertEquals(url_map.get_url(), '/test/1/')
+        self.assertEquals(len(cache.reverse_cache), 1)
+        self.assertEquals(url_map.get_url(), '/test/1/')
+        self.assertEquals(len(cache.reverse_cache), 1)
+
+    def test_urlconf_change_clears_reverse_cache(self):
+        URLMap(key='test_3', view_name='test').get_url()
+        with self.settings(ROOT_URLCONF='urlmapper.tests.urls'):
+            self.assertEquals(len(cache.reverse_cache), 0)
+
+
+class TestResolvedURL(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('test')
+
+    def tearDown(self):
+        reload(settings)
+
+    def test_resolved_on_save(self):
+        url_map = URLMap.objects.create(key='test_3', url='/test/')
+        self.assertEquals(url_map.resolved_url, '/test/')
+        url_map.url = '/test/1/'
+        url_map.save()
+        self.assertEquals(
+            URLMap.objects.get(pk=url_map.pk).resolved_url,
+            '/test/1/'
+        )
+
+    def test_view_reversed_when_read(self):
+        URLMap.objects.create(key='test_3', view_name='test')
+        url_map = URLMap.objects.get(key='test_3')
+        # Views depend on the language and script prefix, so are not stored
+        self.assertEquals(url_map.resolved_url, '')
+        self.assertEquals(url_map.get_resolved_url(), '/test/')
+        set_script_prefix('/app/')
+        try:
+            self.assertEquals(url_map.get_resolved_url(), '/app/test/')
+        finally:
+            set_script_prefix('/')
+
+    def test_watched_object_is_refreshed(self):
+        with self.settings(URLMAPPER_CONTENTTYPES=[('auth', 'user')]):
+            reload(settings)
+        URLMap.objects.create(key='test_3', content_object=self.user)
+        url_map = URLMap.objects.get(key='test_3')
+        with self.assertNumQueries(0):
+            self.assertEquals(url_map.get_resolved_url(), '/users/test/')
+
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertEquals(
+            URLMap.objects.get(key='test_3').get_resolved_url(),
+            '/users/renamed/'
+        )
+
+        self.user.delete()
+        self.assertEquals(URLMap.objects.get(key='test_3').get_resolved_url(), '')
+
+    def test_unwatched_object_is_resolved_afresh(self):
+        URLMap.objects.create(key='test_3', content_object=self.user)
+        self.user.username = 'renamed'
+        self.user.save()
+        url_map = URLMap.objects.get(key='test_3')
+        self.assertEquals(url_map.resolved_url, '/users/test/')
+        self.assertEquals(url_map.get_resolved_url(), '/users/renamed/')
+
+    def test_refresh_resolved_urls(self):
+        URLMap.objects.create(key='test_3', content_object=self.user)
+        URLMap.objects.create(key='test_4', url='/test/')
+        URLMap.objects.create(key='test_5', view_name='test')
+        URLMap.objects.filter(key='test_3').update(resolved_url='/stale/')
+        self.assertEquals(refresh_resolved_urls(), ['test_3'])
+        self.assertEquals(
+            URLMap.objects.get(key='test_3').resolved_url, '/users/test/'
+        )
+        self.assertEquals(refresh_resolved_urls(), [])
+
+    def test_refresh_invalidates_views(self):
+        URLMap.objects.create(key='test_3', view_name='test')
+        cache.clear()
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+        cache.set_url(cache.partition_key('test_3'), '/stale/')
+        self.assertEquals(refresh_resolved_urls(), [])
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+
+    def test_refresh_command(self):
+        URLMap.objects.create(key='test_3', content_object=self.user)
+        URLMap.objects.filter(key='test_3').update(resolved_url='/stale/')
+        stdout = StringIO()
+        call_command('urlmapper_refresh', stdout=stdout)
+        self.assertIn("Updated test_3", stdout.getvalue())
+        self.assertEquals(
+            URLMap.objects.get(key='test_3').resolved_url, '/users/test/'
+        )
@@ -0,0 +1,81 @@
+from django.test import TestCase
+from django.utils import translation
+
+from ..helpers import get_mapped_url, get_mapped_urls
+from ..memo import memoize
+from ..models import URLMap
+from ..snapshot import snapshot_key
+from .. import cache, settings
+
+
+class TestPartitionedMappings(TestCase):
+
+    def setUp(self):
+        reload(settings)
+        URLMap.objects.create(key='test_3', url='/test/')
+        URLMap.objects.create(key='test_3', language='fr', url='/test/fr/')
+        URLMap.objects.create(key='test_3', language='en', url='/test/en/')
+        URLMap.objects.create(key='test_3', site_id=2, url='/test/2/')
+        URLMap.objects.create(key='test_4', language='fr', url='/test/4/')
+        cache.clear()
+
+    def _get(self, language, site_id=1):
+        with self.settings(SITE_ID=site_id):
+            with translation.override(language):
+                return get_mapped_url('test_3')
+
+    def test_language(self):
+        with self.assertNumQueries(1):
+            self.assertEquals(self._get('fr'), '/test/fr/')
+        self.assertEquals(self._get('en'), '/test/en/')
+
+    def test_generic_language(self):
+        self.assertEquals(self._get('en-gb'), '/test/en/')
+
+    def test_every_language(self):
+        self.assertEquals(self._get('de'), '/test/')
+        with translation.override('de'):
+            self.assertEquals(get_mapped_url('test_4'), '')
+
+    def test_site_before_language(self):
+        self.assertEquals(self._get('fr', site_id=2), '/test/2/')
+        self.assertEquals(self._get('fr', site_id=3), '/test/fr/')
+
+    def test_cache_is_partitioned(self):
+        self.assertEquals(self._get('fr'), '/test/fr/')
+        with self.assertNumQueries(1):
+            self.assertEquals(self._get('en'), '/test/en/')
+        with self.assertNumQueries(0):
+            self.assertEquals(self._get('fr'), '/test/fr/')
+            self.assertEquals(self._get('en'), '/test/en/')
+
+    def test_memo_is_partitioned(self):
+        with memoize():
+            self.assertEquals(self._get('fr'), '/test/fr/')
+            cache.clear()
+            with self.assertNumQueries(1):
+                self.assertEquals(self._get('en'), '/test/en/')
+            with self.assertNumQueries(0):
+                self.assertEquals(self._get('fr'), '/test/fr/')
+
+    def test_get_mapped_urls(self):
+        with translation.override('fr'):
+            with self.assertNumQueries(1):
+                self.assertEquals(
+                    get_mapped_urls(['test_3', 'test_4']),
+                    {'test_3': '/test/fr/', 'test_4': '/test/4/'}
+                )
+        with translation.override('de'):
+            self.assertEquals(
+                get_mapped_urls(['test_3', 'test_4']),
+                {'test_3': '/test/', 'test_4': ''}
+            )
+
+    def test_saving_a_variant_clears_the_cache(self):
+        self.assertEquals(self._get('de'), '/test/')
+        URLMap.objects.create(key='test_3', language='de', url='/test/de/')
+        self.assertEquals(self._get('de'), '/test/de/')
+
+    def test_snapshot_key(self):
+        self.assertEquals(snapshot_key('test_3'), 'test_3')
+        self.assertEquals(snapshot_key('test_3', 2, 'fr'), 'test_3|2|fr')
@@ -0,0 +1,77 @@
+import pkg_resources
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from ..admin import URLMapForm
+from ..helpers import check_mapped_url, get_mapped_url
+from ..models import URLMap
+from .. import registry, settings
+
+
+class FakeEntryPoint(object):
+
+    def __init__(self, provided):
+        self.provided = provided
+
+    def load(self):
+        return self.provided
+
+
+class TestKeyRegistry(TestCase):
+
+    def setUp(self):
+        reload(settings)
+
+    def tearDown(self):
+        registry._registered.clear()
+        registry._entry_point_keys = None
+        registry._keys = None
+        reload(settings)
+
+    def test_settings_keys(self):
+        self.assertIsInstance(registry.get_keys(), frozenset)
+        self.assertTrue(registry.is_valid_key('test_3'))
+        self.assertFalse(registry.is_valid_key('test_6'))
+
+    def test_reloaded_settings(self):
+        with self.settings(URLMAPPER_KEYS=['other'], URLMAPPER_FUNCTIONS={}):
+            reload(settings)
+            self.assertEquals(registry.get_keys(), frozenset(['other']))
+
+    def test_register_keys(self):
+        registry.register_keys('test_6')
+        self.assertTrue(registry.is_valid_key('test_6'))
+        URLMap.objects.create(key='test_6', url='/test/')
+        self.assertEquals(get_mapped_url('test_6'), '/test/')
+        self.assertTrue(check_mapped_url('test_6'))
+        self.assertIn(('test_6', 'test_6'), registry.get_key_choices())
+
+    def test_entry_points(self):
+        original = pkg_resources.iter_entry_points
+        pkg_resources.iter_entry_points = lambda group: [
+            FakeEntryPoint(['test_6']),
+            FakeEntryPoint(lambda: ['test_7']),
+        ]
+        registry._entry_point_keys = None
+        registry._keys = None
+        try:
+            self.assertTrue(registry.is_valid_key('test_6'))
+            self.assertTrue(registry.is_valid_key('test_7'))
+        finally:
+            pkg_resources.iter_entry_points = original
+
+    def test_model_validation(self):
+        with self.assertRaises(ValidationError):
+            URLMap(key='test_6', url='/test/').clean_fields()
+        with self.assertRaises(ValidationError):
+            URLMap(key='test_1', url='/test/').clean_fields()
+        URLMap(key='test_3', url='/test/').clean_fields()
+
+    def test_form_choices(self):
+        registry.register_keys('test_6')
+        form = URLMapForm()
+        self.assertEquals(
+            [key for key, label in form.fields['key'].choices],
+            ['test_3', 'test_4', 'test_5', 'test_6']
+        )
@@ -0,0 +1,139 @@
+from StringIO import StringIO
+import logging
+import os
+import shutil
+import stat
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import translation
+
+from ..decorators import cache_mapping
+from ..helpers import get_mapped_url, get_mapped_urls, check_mapped_url
+from ..models import URLMap
+from ..snapshot import SnapshotError, dumps, loads, snapshot_key, write
+from .. import cache, settings
+
+
+class TestSnapshotFormat(TestCase):
+
+    def test_round_trip(self):
+        mappings = {'test_3': '/test/', 'test_4': ''}
+        self.assertEquals(loads(dumps(mappings)), mappings)
+
+    def test_invalid(self):
+        with self.assertRaises(SnapshotError):
+            loads('not json')
+        with self.assertRaises(SnapshotError):
+            loads('{}')
+
+    def test_checksum_mismatch(self):
+        data = dumps({'test_3': '/test/'}).replace('/test/', '/other/')
+        with self.assertRaises(SnapshotError):
+            loads(data)
+
+
+class TestSnapshotMode(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'urlmapper.json')
+        cache.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        reload(settings)
+
+    def use_snapshot(self, **options):
+        options.update(PATH=self.path, CHECK_INTERVAL=0)
+        with self.settings(URLMAPPER_SNAPSHOT=options):
+            reload(settings)
+
+    def test_readable_by_other_users(self):
+        umask = os.umask(0o022)
+        try:
+            write(self.path, {'test_3': '/test/'})
+        finally:
+            os.umask(umask)
+        self.assertEquals(stat.S_IMODE(os.stat(self.path).st_mode), 0o644)
+
+    def test_command(self):
+        with self.settings(URLMAPPER_FUNCTIONS={
+            'test_1': cache_mapping()(lambda: '/static/'),
+            'test_2': lambda request: '/dynamic/',
+        }):
+            reload(settings)
+            URLMap.objects.create(key='test_3', url='/test/')
+            call_command('urlmapper_snapshot', self.path, stdout=StringIO())
+        with open(self.path) as f:
+            self.assertEquals(
+                loads(f.read()),
+                {
+                    'test_1': '/static/',
+                    'test_3': '/test/',
+                    'test_4': '',
+                    'test_5': '',
+                }
+            )
+
+    def test_partitioned(self):
+        write(self.path, {
+            'test_3': '/test/',
+            snapshot_key('test_3', 0, 'fr'): '/test/fr/',
+            snapshot_key('test_3', 2, ''): '/test/2/',
+        })
+        self.use_snapshot()
+        with self.assertNumQueries(0):
+            with translation.override('fr'):
+                self.assertEquals(get_mapped_url('test_3'), '/test/fr/')
+                with self.settings(SITE_ID=2):
+                    self.assertEquals(get_mapped_url('test_3'), '/test/2/')
+            with translation.override('de'):
+                self.assertEquals(get_mapped_url('test_3'), '/test/')
+
+    def test_served_without_database(self):
+        write(self.path, {'test_3': '/test/'})
+        self.use_snapshot()
+        with self.assertNumQueries(0):
+            self.assertEquals(get_mapped_url('test_3'), '/test/')
+            self.assertTrue(check_mapped_url('test_3'))
+            self.assertEquals(get_mapped_url('test_4'), '')
+            self.assertEquals(get_mapped_url('test_1'), 'test_1_success')
+            self.assertEquals(
+                get_mapped_urls(['test_3', 'test_4']),
+                {'test_3': '/test/', 'test_4': ''}
+            )
+
+    def test_fallback(self):
+        write(self.path, {'test_3': '/test/'})
+        URLMap.objects.create(key='test_4', url='/test/4/')
+        self.use_snapshot(FALLBACK=True)
+        self.assertEquals(get_mapped_url('test_4'), '/test/4/')
+        self.assertEquals(get_mapped_urls(['test_4']), {'test_4': '/test/4/'})
+
+    def test_reloaded_when_modified(self):
+        write(self.path, {'test_3': '/test/'})
+        self.use_snapshot()
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+        write(self.path, {'test_3': '/test/other/'})
+        os.utime(self.path, (0, 0))
+        self.assertEquals(get_mapped_url('test_3'), '/test/other/')
+
+    def test_invalid_reload_keeps_last_snapshot(self):
+        write(self.path, {'test_3': '/test/'})
+        self.use_snapshot()
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+        with open(self.path, 'w') as f:
+            f.write('invalid')
+        os.utime(self.path, (0, 0))
+
+        stream = StringIO()
+        handler = logging.StreamHandler(stream)
+        logger = logging.getLogger('urlmapper')
+        logger.addHandler(handler)
+        try:
+            self.assertEquals(get_mapped_url('test_3'), '/test/')
+        finally:
+            logger.removeHandler(handler)
+        self.assertIn("Cannot reload URL mapper snapshot", stream.getvalue())
@@ -1,8 +1,9 @@
 from django.template import Template, Context
 from django.test import TestCase
 
-from ..import settings
+from ..import cache, settings
 from ..models import URLMap
+from ..templatetags.urlmapper_tags import PreloadMappedURLsNode
 
 
 class TestTags(TestCase):
@@ -44,3 +45,52 @@ class TestTags(TestCase):
             self.assertIn("test_4_url:()", output)
             self.assertIn("test_5_url:()", output)
             self.assertIn("test_6_url:()", output)
+
+
+class TestPreloadMappedURLs(TestCase):
+
+    def setUp(self):
+        reload(settings)
+        cache.clear()
+        self.context = Context({'request': None, 'key': 'test_4'})
+        URLMap.objects.create(key='test_3', url='test_3_success')
+        URLMap.objects.create(key='test_4', url='test_4_success')
+
+    def test_keys_are_collected(self):
+        template = Template("""
+        {% load urlmapper_tags %}
+        {% preload_mapped_urls %}
+            {% if 'test_3'|is_mapped_url %}{% mapped_url 'test_3' %}{% endif %}
+            {% for i in '12' %}{{ 'test_5'|is_mapped_url }}{% endfor %}
+            {% mapped_url key %}
+        {% endpreload_mapped_urls %}
+        """)
+        self.assertEquals(
+            template.nodelist.get_nodes_by_type(PreloadMappedURLsNode)[0].keys,
+            set(['test_3', 'test_5'])
+        )
+
+    def test_preloaded_keys_are_looked_up_once(self):
+        template = Template("""
+        {% load urlmapper_tags %}
+        {% preload_mapped_urls %}
+            {% if 'test_3'|is_mapped_url %}({% mapped_url 'test_3' %}){% endif %}
+            {% if 'test_4'|is_mapped_url %}({% mapped_url 'test_4' %}){% endif %}
+            {% if 'test_5'|is_mapped_url %}({% mapped_url 'test_5' %}){% endif %}
+            ({% mapped_url 'test_1' %})
+        {% endpreload_mapped_urls %}
+        """)
+        with self.assertNumQueries(1):
+            output = template.render(self.context)
+        self.assertIn("(test_3_success)", output)
+        self.assertIn("(test_4_success)", output)
+        self.assertNotIn("test_5", output)
+        self.assertIn("(test_1_success)", output)
+
+    def test_invalid_key_is_raised_by_tag(self):
+        template = Template("""
+        {% load urlmapper_tags %}
+        {% preload_mapped_urls %}{% mapped_url 'invalid' %}{% endpreload_mapped_urls %}
+        """)
+        with self.assertRaises(KeyError):
+            template.render(self.context)
@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..helpers import get_mapped_url
+from ..models import URLMap
+from ..transfer import (
+    export_rows, import_rows, read_csv, read_json, write_csv, write_json
+)
+from .. import cache, settings
+
+
+class TestTransfer(TestCase):
+
+    def setUp(self):
+        reload(settings)
+        cache.clear()
+        self.user = User.objects.create(username='test')
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _rows(self):
+        return [
+            {'key': 'test_3', 'url': '/test/'},
+            {'key': 'test_4', 'view_name': 'test'},
+            {
+                'key': 'test_5',
+                'content_type': 'auth.user',
+                'object_id': self.user.pk,
+            },
+        ]
+
+    def test_import(self):
+        URLMap.objects.create(key='test_3', url='/old/')
+        self.assertEquals(get_mapped_url('test_3'), '/old/')
+        with self.assertNumQueries(6):
+            # Existence of objects, existing keys, and the writes
+            self.assertEquals(import_rows(self._rows()), (2, 1))
+        self.assertEquals(get_mapped_url('test_3'), '/test/')
+        self.assertEquals(get_mapped_url('test_4'), '/test/')
+        self.assertEquals(
+            URLMap.objects.get(key='test_5').resolved_url,
+            self.user.get_absolute_url()
+        )
+
+    def test_import_invalid(self):
+        rows = self._rows()
+        rows[0]['url'] = '/invalid/'
+        rows[2]['object_id'] = self.user.pk + 1
+        rows.append({'key': 'test_1', 'url': '/test/'})
+        with self.assertRaises(ValidationError) as cm:
+            import_rows(rows)
+        messages = '\n'.join(cm.exception.messages)
+        self.assertIn("test_3 (all sites, all languages):", messages)
+        self.assertIn(
+            "test_5 (all sites, all languages): Object does not exist",
+            messages
+        )
+        self.assertIn("test_1 (all sites, all languages): Key test_1 is not in URLMAPPER_KEYS or is mapped to a function.", messages)
+        self.assertFalse(URLMap._objects.exists())
+
+    def test_round_trip(self):
+        import_rows(self._rows())
+        for write, read in ((write_json, read_json), (write_csv, read_csv)):
+            stream = StringIO()
+            write(export_rows(), stream)
+            stream.seek(0)
+            rows = list(read(stream))
+            self.assertEquals([row['key'] for row in rows], ['test_3', 'test_4', 'test_5'])
+            URLMap.objects.all().delete()
+            self.assertEquals(import_rows(rows), (3, 0))
+
+    def test_json_is_a_list(self):
+        import_rows(self._rows())
+        stream = StringIO()
+        write_json(export_rows(), stream)
+        self.assertEquals(
+            json.loads(stream.getvalue())[2]['content_type'], 'auth.user'
+        )
+
+    def test_commands(self):
+        import_rows(self._rows())
+        path = os.path.join(self.directory, 'mappings.csv')
+        call_command('urlmapper_export', path, format='csv')
+        URLMap.objects.all().delete()
+        stdout = StringIO()
+        call_command('urlmapper_import', path, stdout=stdout)
+        self.assertIn("Created 3 and updated 0 mapping(s)", stdout.getvalue())
+        self.assertEquals(URLMap.objects.count(), 3)
+
+    def test_import_command_invalid(self):
+        path = os.path.join(self.directory, 'mappings.json')
+        with open(path, 'w') as f:
+            json.dump([{'key': 'test_3', 'url': '/invalid/'}], f)
+        with self.assertRaises(CommandError):
+            call_command('urlmapper_import', path)
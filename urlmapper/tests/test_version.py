@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.template import Template, Context, RequestContext
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from ..context_processors import mapped_url_version
+from ..helpers import get_mapped_url, get_mapping_version
+from ..models import URLMap, refresh_resolved_urls
+from .. import cache, settings
+
+
+class TestMappingVersion(TestCase):
+
+    def setUp(self):
+        reload(settings)
+        cache.clear()
+
+    def tearDown(self):
+        reload(settings)
+
+    def test_unchanged_by_lookups(self):
+        URLMap.objects.create(key='test_3', url='/test/')
+        version = get_mapping_version()
+        get_mapped_url('test_3')
+        get_mapped_url('test_4')
+        self.assertEquals(get_mapping_version(), version)
+
+    def test_changed_by_mappings(self):
+        version = get_mapping_version()
+        url_map = URLMap.objects.create(key='test_3', url='/test/')
+        self.assertNotEquals(get_mapping_version(), version)
+        version = get_mapping_version()
+        url_map.delete()
+        self.assertNotEquals(get_mapping_version(), version)
+
+    def test_changed_by_watched_objects(self):
+        with self.settings(URLMAPPER_CONTENTTYPES=[('auth', 'user')]):
+            reload(settings)
+        user = User.objects.create_user('test')
+        URLMap.objects.create(key='test_3', content_object=user)
+        version = get_mapping_version()
+        user.save()
+        # The URL has not changed
+        self.assertEquals(get_mapping_version(), version)
+        user.username = 'renamed'
+        user.save()
+        self.assertNotEquals(get_mapping_version(), version)
+
+    def test_changed_by_refresh(self):
+        URLMap.objects.create(key='test_3', url='/test/')
+        URLMap.objects.filter(key='test_3').update(resolved_url='/old/')
+        version = get_mapping_version()
+        refresh_resolved_urls()
+        self.assertNotEquals(get_mapping_version(), version)
+
+    def test_shared_cache(self):
+        with self.settings(URLMAPPER_CACHE={'ALIAS': 'default'}):
+            reload(settings)
+        shared_cache = cache.get_shared_cache()
+        shared_cache.clear()
+        version = get_mapping_version()
+        self.assertEquals(get_mapping_version(), version)
+        # Simulate a change in another process
+        shared_cache.incr('urlmapper:generation')
+        self.assertNotEquals(get_mapping_version(), version)
+
+    def test_tag(self):
+        template = Template(
+            "{% load urlmapper_tags %}{% mapped_url_version %}"
+        )
+        self.assertEquals(
+            template.render(Context()), str(get_mapping_version())
+        )
+
+    def test_context_processor(self):
+        request = RequestFactory().get('/')
+        template = Template("{{ mapped_url_version }}")
+        context = RequestContext(request, processors=[mapped_url_version])
+        self.assertEquals(template.render(context), str(get_mapping_version()))
@@ -0,0 +1,118 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from ..decorators import cache_mapping
+from ..models import URLMap
+from .. import cache, settings
+
+
+class TestMappedURLsView(TestCase):
+
+    def setUp(self):
+        self.function_url = '/cached/'
+
+        @cache_mapping(timeout=60)
+        def cached():
+            return self.function_url
+
+        with self.settings(URLMAPPER_FUNCTIONS={
+            'test_1': lambda request: '/varies/',
+            'test_2': cached
+        }):
+            reload(settings)
+        cache.clear()
+        URLMap.objects.create(key='test_3', url='/test/')
+
+    def tearDown(self):
+        reload(settings)
+
+    def test_static_keys(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/mapped-urls/')
+        self.assertEquals(response['Content-Type'], 'application/json')
+        self.assertEquals(
+            response.content,
+            b'{"test_2":"/cached/","test_3":"/test/","test_4":"","test_5":""}'
+        )
+
+    def test_subset(self):
+        response = self.client.get('/mapped-urls/?keys=test_1,test_3,invalid')
+        self.assertEquals(json.loads(response.content), {'test_3': '/test/'})
+
+    def test_not_modified(self):
+        response = self.client.get('/mapped-urls/')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('max-age=0', response['Cache-Control'])
+        self.assertIn('must-revalidate', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/mapped-urls/', HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEquals(response.status_code, 304)
+        self.assertEquals(response['ETag'], etag)
+        self.assertEquals(response.content, b'')
+
+        other_response = self.client.get(
+            '/mapped-urls/?keys=test_3', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEquals(other_response.status_code, 200)
+
+    def test_etag_changes_with_mappings(self):
+        etag = self.client.get('/mapped-urls/')['ETag']
+        URLMap.objects.create(key='test_4', url='/test/4/')
+        response = self.client.get('/mapped-urls/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+        self.assertNotEquals(response['ETag'], etag)
+        self.assertEquals(json.loads(response.content)['test_4'], '/test/4/')
+
+    def test_etag_same_in_every_process(self):
+        etag = self.client.get('/mapped-urls/')['ETag']
+        # Simulate another process, with its own mapping version
+        cache._increment_local_version()
+        response = self.client.get('/mapped-urls/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 304)
+
+    def test_shared_cache(self):
+        with self.settings(URLMAPPER_CACHE={'ALIAS': 'default'}):
+            reload(settings)
+        cache.get_shared_cache().clear()
+        etag = self.client.get('/mapped-urls/')['ETag']
+        cache.local_cache.clear()
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/mapped-urls/', HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEquals(response.status_code, 304)
+
+        URLMap.objects.create(key='test_4', url='/test/4/')
+        response = self.client.get('/mapped-urls/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(json.loads(response.content)['test_4'], '/test/4/')
+
+    def test_etag_changes_with_unwatched_objects(self):
+        with self.settings(URLMAPPER_CACHE={'ALIAS': 'default'}):
+            reload(settings)
+        cache.get_shared_cache().clear()
+        user = User.objects.create(username='old')
+        URLMap.objects.create(key='test_4', content_object=user)
+        etag = self.client.get('/mapped-urls/')['ETag']
+        user.username = 'new'
+        user.save()
+        response = self.client.get('/mapped-urls/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(json.loads(response.content)['test_4'], '/users/new/')
+
+    def test_etag_changes_with_expired_functions(self):
+        etag = self.client.get('/mapped-urls/')['ETag']
+        self.function_url = '/cached/new/'
+        cache.local_cache.clear()
+        response = self.client.get('/mapped-urls/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(json.loads(response.content)['test_2'], '/cached/new/')
+
+    def test_safe_methods_only(self):
+        self.assertEquals(self.client.post('/mapped-urls/').status_code, 405)
@@ -1,9 +1,16 @@
-from django.conf.urls import url
+from django.conf.urls import include, url
+from django.http import HttpResponse
 from django.views.generic import TemplateView
 
 
+def ok(request):
+    return HttpResponse(request.get_host())
+
+
 urlpatterns = [
     url(r'test/$', TemplateView.as_view(), name='test'),
     url(r'test/(?P<slug>[-\w]+)/$', TemplateView.as_view(), name='test'),
     url(r'test/(?P<pk>\d+)/$', TemplateView.as_view(), name='test'),
+    url(r'^ok/$', ok),
+    url(r'^mapped-urls/', include('urlmapper.urls')),
 ]
@@ -0,0 +1,177 @@
+import csv
+import json
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+
+from checks import check_objects, describe, identify, validate_fields
+from helpers import BATCH_SIZE
+from models import URLMap, clear_cached_urls
+
+
+FIELDS = (
+    'key', 'site_id', 'language', 'url', 'content_type', 'object_id',
+    'view_name', 'view_keywords'
+)
+
+
+def _to_row(url_map):
+    content_type = url_map.content_type
+    return {
+        'key': url_map.key,
+        'site_id': url_map.site_id,
+        'language': url_map.language,
+        'url': url_map.url,
+        'content_type': (
+            u"{0}.{1}".format(content_type.app_label, content_type.model)
+            if content_type is not None else u''
+        ),
+        'object_id': url_map.object_id,
+        'view_name': url_map.view_name,
+        'view_keywords': url_map.view_keywords,
+    }
+
+
+def export_rows():
+    """
+    Yield a dictionary of FIELDS for each mapping in the database, without
+    loading them all into memory.
+    """
+    queryset = URLMap.objects.select_related('content_type').order_by(
+        'key', 'site_id', 'language'
+    )
+    for url_map in queryset.iterator():
+        yield _to_row(url_map)
+
+
+def write_json(rows, stream):
+    """
+    Write rows to a stream as a JSON list, one row at a time.
+    """
+    stream.write('[')
+    for i, row in enumerate(rows):
+        stream.write(',\n' if i else '\n')
+        stream.write(json.dumps(row, sort_keys=True))
+    stream.write('\n]\n')
+
+
+def write_csv(rows, stream):
+    writer = csv.DictWriter(stream, FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(dict(
+            (name, unicode(value if value is not None else u'').encode('utf-8'))
+            for name, value in row.items()
+        ))
+
+
+def read_json(stream):
+    return json.load(stream)
+
+
+def read_csv(stream):
+    for row in csv.DictReader(stream):
+        yield dict(
+            (name, (value or '').decode('utf-8')) for name, value in row.items()
+        )
+
+
+def _get_content_type(label):
+    app_label, _, model = label.partition('.')
+    return ContentType.objects.get_by_natural_key(app_label, model)
+
+
+def _build(row):
+    """
+    Return an unsaved URLMap for a row, checking everything except whether
+    its object exists.
+    """
+    row = dict(row)
+    content_type = row.pop('content_type', None)
+    object_id = row.pop('object_id', None)
+    site_id = row.pop('site_id', None)
+    url_map = URLMap(**dict(
+        (name, row.get(name) or u'') for name in FIELDS if name in row
+    ))
+    if content_type:
+        try:
+            url_map.content_type = _get_content_type(content_type)
+        except ContentType.DoesNotExist:
+            raise ValidationError(
+                "Unknown content type {type}".format(type=content_type)
+            )
+    if object_id not in (None, u''):
+        url_map.object_id = object_id
+    if site_id not in (None, u''):
+        url_map.site_id = site_id
+    validate_fields(url_map)
+    return url_map
+
+
+def import_rows(rows):
+    """
+    Create or update a mapping for each row, a dictionary of FIELDS, in one
+    transaction. Every row is validated before anything is written; if any
+    are invalid, a ValidationError listing them is raised.
+
+    Returns the numbers of mappings created and updated.
+    """
+    url_maps = []
+    errors = []
+    seen = set()
+    for row in rows:
+        try:
+            url_map = _build(row)
+        except ValidationError as e:
+            errors.append((
+                (row.get('key'), row.get('site_id'), row.get('language')),
+                '; '.join(e.messages)
+            ))
+            continue
+        if identify(url_map) in seen:
+            errors.append((
+                identify(url_map), "Duplicate key, site and language"
+            ))
+            continue
+        seen.add(identify(url_map))
+        url_maps.append(url_map)
+    check_objects(url_maps, errors)
+    if errors:
+        raise ValidationError([
+            u"{mapping}: {error}".format(mapping=describe(identity), error=error)
+            for identity, error in errors
+        ])
+
+    for url_map in url_maps:
+        url_map.resolved_url = url_map.get_stored_url()
+
+    existing = {}
+    keys = list(set(url_map.key for url_map in url_maps))
+    for i in range(0, len(keys), BATCH_SIZE):
+        existing.update(
+            ((key, site_id, language), pk)
+            for key, site_id, language, pk in URLMap._objects.filter(
+                key__in=keys[i:i + BATCH_SIZE]
+            ).values_list('key', 'site_id', 'language', 'pk')
+        )
+
+    created = [
+        url_map for url_map in url_maps if identify(url_map) not in existing
+    ]
+    updated = [
+        url_map for url_map in url_maps if identify(url_map) in existing
+    ]
+    with transaction.atomic(using=router.db_for_write(URLMap)):
+        URLMap._objects.bulk_create(created, batch_size=BATCH_SIZE)
+        # Django has no bulk_update before 2.2
+        for url_map in updated:
+            URLMap._objects.filter(pk=existing[identify(url_map)]).update(**dict(
+                (field, getattr(url_map, field)) for field in (
+                    'url', 'content_type', 'object_id', 'view_name',
+                    'view_keywords', 'resolved_url'
+                )
+            ))
+    # Neither bulk_create nor update send post_save
+    clear_cached_urls()
+    return len(created), len(updated)
@@ -0,0 +1,8 @@
+from django.conf.urls import url
+
+from views import mapped_urls
+
+
+urlpatterns = [
+    url(r'^$', mapped_urls, name='urlmapper_mapped_urls'),
+]
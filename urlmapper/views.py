@@ -0,0 +1,51 @@
+import hashlib
+import json
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.http import require_safe
+
+from helpers import get_mapped_urls, get_static_keys
+
+
+def _get_keys(request):
+    """
+    Return the static keys requested with ?keys=a,b,c, or all of them.
+    Keys that are not static are left out.
+    """
+    static_keys = get_static_keys()
+    requested = request.GET.get('keys')
+    if requested is None:
+        return static_keys
+    requested = set(requested.split(','))
+    return [key for key in static_keys if key in requested]
+
+
+@require_safe
+def mapped_urls(request, max_age=0):
+    """
+    Return the URLs of the keys that are the same for every request, or those
+    of them given as ?keys=a,b,c, as a JSON object of keys to URLs.
+
+    Responses have a strong ETag that changes with the URLs, so that clients
+    can revalidate them with If-None-Match, and may be cached for max_age
+    seconds.
+    """
+    keys = _get_keys(request)
+    content = json.dumps(
+        get_mapped_urls(keys, request), separators=(',', ':'), sort_keys=True
+    )
+    # Taken from the content, since the mapping version does not cover
+    # objects that are not watched or functions whose URLs have expired, and
+    # is kept by each process when there is no shared cache.
+    etag = hashlib.md5(content).hexdigest()
+
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = quote_etag(etag)
+    patch_cache_control(response, max_age=max_age, must_revalidate=True)
+    return response